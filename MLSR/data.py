@@ -1,6 +1,357 @@
+import os
+import time
+import numpy as np
 import pandas as pd
-from numpy import random, zeros
-from jieba import suggest_freq, cut
+from joblib.externals.loky import get_reusable_executor
+from numpy import random
+from .keywords import POLICY_KEYWORDS, ORPHAN_KEYWORDS, INCOME_KEYWORDS, INCOME_EXACT
+from .keywords import EDUCATION_KEYWORDS, EDUCATION_ZERO_CONTAINS, EDUCATION_ZERO_EXACT
+from .keywords import ACCIDENT_KEYWORDS, ACCIDENT_ZERO, DISASTER_KEYWORDS, SCHOLARSHIP_AMOUNTS
+from .matcher import KeywordMatcher
+from .tokenizer import CachedTokenizer, default_tokenizer, segment
+from .store import ColumnStore, ColumnBuffer, FeatureCache, save_store
+from .profiling import FeatureReport, measure
+
+_POLICY_MATCHER = KeywordMatcher(POLICY_KEYWORDS)
+_ORPHAN_MATCHER = KeywordMatcher({'孤残学生': ORPHAN_KEYWORDS})
+_INCOME_MATCHER = KeywordMatcher(INCOME_KEYWORDS, INCOME_EXACT)
+_DISASTER_MATCHER = KeywordMatcher({'突发重大自然灾害': DISASTER_KEYWORDS})
+# 每个社会助学金一位，最后两位为国家助学金和“一等”
+_SCHOLARSHIP_MATCHER = KeywordMatcher(dict(
+    [(k, (k,)) for k in SCHOLARSHIP_AMOUNTS] + [('国家助学金', ('国家', '国助')), ('一等', ('一',))]
+))
+
+
+# generate_feature输出的各个特征的存储类型：标志位用bool/uint8，计数用uint8，收入和助学金金额用float32
+FEATURE_DTYPES = {
+    '建档立卡贫困户': 'bool', '城乡低保户': 'bool', '五保户': 'bool', '孤残学生': 'bool',
+    '军烈属或优抚子女': 'bool', '经商': 'bool', '务农': 'bool', '退休': 'bool',
+    '低保': 'bool', '打工': 'bool', '父母均下岗': 'bool', '父母一方下岗': 'bool',
+    '家庭人均年收入': 'float32', '大学': 'uint8', '高中': 'uint8', '义务教育': 'uint8',
+    '祖父母患病': 'uint8', '父母离异': 'uint8', '父亲（母亲）患普通疾病': 'uint8',
+    '父母患普通疾病': 'uint8', '兄弟姐妹患重疾': 'uint8', '父亲（母亲）患重疾': 'uint8',
+    '父母患重疾': 'uint8', '父亲（母亲）去世': 'uint8', '突发重大自然灾害': 'uint8',
+    '助学金个数': 'uint8', '助学金金额': 'float32', '国助类型': 'uint8', '民族': 'bool',
+    '家庭人口': 'uint8', '是否贷款': 'bool', '入学前户口性质': 'bool'
+}
+
+
+def scholarship_arrays(s: pd.Series) -> tuple:
+    """
+    在校受奖励资助情况一次扫描得到助学金个数、总金额和国家助学金类型
+
+    Args:
+        s: 在校受奖励资助情况，缺失值视为没有获得助学金
+
+    Returns: 三个与s等长的numpy.ndarray(int64)：助学金个数，助学金总金额，
+        国家助学金类型（0为未获得，1为国家二等助学金，2为国家一等助学金）
+
+    """
+    m = _SCHOLARSHIP_MATCHER.masks(s)
+    cnt = np.zeros(len(m), dtype='int64')
+    tot = np.zeros(len(m), dtype='int64')
+    for i, amount in enumerate(SCHOLARSHIP_AMOUNTS.values()):
+        hit = (m >> i) & 1
+        cnt += hit
+        tot += hit * amount
+    i = len(SCHOLARSHIP_AMOUNTS)
+    national = (m >> i) & 1
+    first = national & (m >> (i + 1))
+    cnt += national
+    tot += national * 2800 + first * 1000
+    return cnt, tot, national + first
+
+
+def _broadcast(s: pd.Series, func, na_value, dtype, batch: bool = False) -> np.ndarray:
+    """
+    对一列中每个不同的取值只调用一次func，再用编码把结果映射回每一行
+
+    Args:
+        s: 待处理的pandas.Series，可以是category类型
+        func: 作用在单个取值上的函数，返回标量或tuple
+        na_value: 缺失值按这个值调用func
+        dtype: 结果的numpy类型
+        batch: 为True时func一次处理所有不同取值的list，返回每个取值一行的结果
+
+    Returns: numpy.ndarray，第一维与s等长
+
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s)
+    # 缺失值的编码为-1，对应表的最后一行
+    if batch:
+        table = np.asarray(func(list(uniques) + [na_value]), dtype=dtype)
+    else:
+        table = np.array([func(x) for x in uniques] + [func(na_value)], dtype=dtype)
+    return table[codes]
+
+
+# do_education的词性编号，0留给补位的空白，其余按EDUCATION_KEYWORDS的顺序从1开始
+_EDU_TAGS = [tag for tag, _ in EDUCATION_KEYWORDS]
+_EDU_VOCAB = {}
+for _i, (_, _words) in enumerate(EDUCATION_KEYWORDS, 1):
+    for _w in _words:
+        _EDU_VOCAB.setdefault(_w, _i)
+
+
+def _edu_table(tags, value=True, default=False) -> tuple:
+    """按词性编号索引的查找表，tags中的词性取value，其余取default"""
+    return (default,) + tuple(value if t in tags else default for t in _EDU_TAGS)
+
+
+_EDU_PAD = 0
+_EDU_NUM = (0,) + tuple({'number1': 1, 'number2': 2, 'number3': 3, 'number4': 4}.get(t, 0) for t in _EDU_TAGS)
+_EDU_PERSON = _edu_table({'member', 'sp_member'}, 1, 0)
+_EDU_MEMBER = _edu_table({'member', 'sp_member', 'invalid_member', 'invalid_sp_member'})
+_EDU_START = _edu_table({'number1', 'number2', 'number3', 'number4',
+                         'member', 'sp_member', 'invalid_member', 'invalid_sp_member'})
+_EDU_SCHOOL = _edu_table({'grad', 'sp_grad', 'college', 'sp_college', 'gr_college', 'high_school',
+                          'gr_high_school', 'compulsory', 'gr_compulsory', 'others'})
+# 学校所属的阶段：0大学，1高中，2义务教育，-1不计数
+_EDU_LEVEL = (-1,) + tuple({
+    'college': 0, 'sp_college': 0, 'gr_college': 0,
+    'high_school': 1, 'gr_high_school': 1,
+    'compulsory': 2, 'gr_compulsory': 2
+}.get(t, -1) for t in _EDU_TAGS)
+# 一组在“学校/空白”之后紧跟“个数/家庭成员/空白”时结束
+_EDU_CLOSE = tuple(i == _EDU_PAD or v for i, v in enumerate(_EDU_SCHOOL))
+_EDU_OPEN = tuple(i == _EDU_PAD or v for i, v in enumerate(_EDU_START))
+
+
+def _education_counts(cut_type: list) -> list:
+    """
+    在一行的词性序列上匹配do_education中的pattern
+
+    先线性扫描把序列切成若干组，每组以个数或家庭成员开头，到“学校 -> 非学校”为止；
+    再对每组线性匹配。组内越过末尾的位置都视为空白。
+
+    Args:
+        cut_type: 关键字的词性编号序列
+
+    Returns: [大学人数, 高中人数, 义务教育人数]
+
+    """
+    counts = [0, 0, 0]
+    seq = cut_type + [_EDU_PAD, _EDU_PAD]  # 确保检测到最后一位也能检测其后两位的元素的词性
+    n = len(seq) - 2
+    serial = 0
+    while serial < n:
+        if not _EDU_START[seq[serial]]:  # 该词不为个数或家庭成员，则访问下一个
+            serial += 1
+            continue
+        end = serial + 1
+        while not (_EDU_CLOSE[seq[end]] and _EDU_OPEN[seq[end + 1]]):
+            end += 1
+        _match_education_group(seq[serial:end + 1] + [_EDU_PAD, _EDU_PAD], counts)
+        serial = end + 1
+    return counts
+
+
+def _match_education_group(group: list, counts: list):
+    """
+    对一组词性序列计数，结果累加到counts中
+
+    Args:
+        group: 一组的词性编号，末尾补了两个空白
+        counts: [大学人数, 高中人数, 义务教育人数]
+
+    """
+    n = len(group) - 2
+    i = 0
+    while i < n:
+        cur, nxt = group[i], group[i + 1]
+        # 个数 -> 学校 -> 非学校或年级
+        if _EDU_NUM[cur] and _EDU_LEVEL[nxt] >= 0:
+            counts[_EDU_LEVEL[nxt]] += _EDU_NUM[cur]
+        elif _EDU_PERSON[cur] and _EDU_SCHOOL[nxt]:
+            # (个数 ->) 家庭成员 -> 学校 -> 非学校，组首的前一位视为空白
+            if not _EDU_SCHOOL[group[i + 2]]:
+                if _EDU_LEVEL[nxt] >= 0:
+                    counts[_EDU_LEVEL[nxt]] += _EDU_NUM[group[i - 1]] or 1
+            # 家庭成员 -> 多个学校 -> 非学校，每个学校算一人
+            else:
+                i += 1
+                while i < n and _EDU_SCHOOL[group[i]]:
+                    if _EDU_LEVEL[group[i]] >= 0:
+                        counts[_EDU_LEVEL[group[i]]] += 1
+                    i += 1
+        # 多个家庭成员 -> 学校 -> 非学校，第一个家庭成员之后的才计数
+        elif _EDU_PERSON[cur] and _EDU_MEMBER[nxt]:
+            i += 1
+            number = 0
+            while i < n and _EDU_MEMBER[group[i]]:
+                number += _EDU_PERSON[group[i]]
+                i += 1
+            if _EDU_LEVEL[group[i]] >= 0:
+                counts[_EDU_LEVEL[group[i]]] += number
+        i += 1
+
+
+# do_accident的关键字到词性编号的映射，一个词只取优先级最高的词性；编号从1开始，0为其他词
+_ACC_TAGS = [None] + [tag for tag, _ in ACCIDENT_KEYWORDS]
+_ACC_IDS = {}
+for _i, (_, _words) in enumerate(ACCIDENT_KEYWORDS, 1):
+    for _w in _words:
+        _ACC_IDS.setdefault(_w, _i)
+# _accident_flags直接在编号上匹配：_ACC为词性到编号的映射，补位的空白为0；
+# 组内出现过的词性记成位掩码，第i个编号对应第i位
+_ACC = {tag: i for i, tag in enumerate(_ACC_TAGS) if tag}
+_ACC_BIT = {tag: 1 << i for tag, i in _ACC.items()}
+_ACC_PEOPLE = {_ACC[t] for t in ("dad", "mom", "grand_parents", "sp_grand_parents", "siblings", "sp_siblings",
+                                 "invalid_member")}
+_ACC_EVENTS = {_ACC[t] for t in ("divorce", "unemployed", "dead", "illness", "serious_illness")}
+_ACC_DAD, _ACC_MOM = _ACC["dad"], _ACC["mom"]
+_ACC_COLUMNS = [
+    "祖父母患病", "父母离异", "父亲（母亲）患普通疾病", "父母患普通疾病", "父亲（母亲）无业", "父母均无业", "兄弟姐妹患重疾",
+    "父亲（母亲）患重疾", "父母患重疾", "父亲（母亲）去世", "突发重大自然灾害"
+]
+
+
+def _accident_flags(ids: list, row: np.ndarray):
+    """
+    在一行的分词结果上匹配do_accident中的pattern，命中的特征在row中置1
+
+    Args:
+        ids: 分词结果的词性编号（见_ACC_IDS），0为其他词
+        row: 长度为11的uint8数组，对应_ACC_COLUMNS，最后一列自然灾害不在这里处理
+
+    """
+    cut_type = []  # 记录某个关键字的词性编号
+    cut_loc = []  # 记录某个关键字在分词结果中的位置
+    for loc, i in enumerate(ids):
+        if i:
+            cut_type.append(i)
+            cut_loc.append(loc)
+    cut_type += [0, 0]  # 确保检测到最后一位也能检测其后两位的元素的词性
+    cut_loc += [None, None]
+
+    bit = _ACC_BIT
+    serial = 0
+    while serial < len(cut_type) - 2:
+        # 每一个pattern起始的词只能为家庭成员
+        if cut_type[serial] not in _ACC_PEOPLE:
+            serial += 1
+            continue
+        group = [cut_type[serial]]
+        group_loc = [cut_loc[serial]]  # 用来判断父母是否连着
+        for forward in range(serial + 1, len(cut_type) - 1):  # 开始检测该pattern内后面的词
+            group.append(cut_type[forward])
+            group_loc.append(cut_loc[forward])
+            if ((cut_type[forward] == 0 or cut_type[forward] in _ACC_EVENTS) and
+                    (cut_type[forward + 1] == 0 or cut_type[forward + 1] in _ACC_PEOPLE)):
+                serial = forward + 1  # 找到行为 -> 人，这一组完成，定位至下一组首个词
+                break
+        group += [0, 0]
+        group_loc += [None, None]
+
+        # 一个或多个家庭成员 -> 一件或多件事情 -> 非事情，flags按位记录组内出现过的词性
+        flags = 0
+        parents = False  # 判断是父或母还是父与母
+        for i in range(len(group) - 2):
+            tag = group[i]
+            if tag == 0:
+                continue
+            flags |= 1 << tag
+            if ((tag == _ACC_DAD and group[i + 1] == _ACC_MOM or tag == _ACC_MOM and group[i + 1] == _ACC_DAD) and
+                    group_loc[i + 1] == group_loc[i] + 1):
+                parents = True
+
+            # 每读入一个词就按当前的词性考察一次该pattern
+            illness = flags & bit["illness"]
+            serious = flags & bit["serious_illness"]
+            dad_or_mom = flags & (bit["dad"] | bit["mom"])
+            one = dad_or_mom and not parents
+            both = dad_or_mom == bit["dad"] | bit["mom"] and parents
+            if flags & (bit["grand_parents"] | bit["sp_grand_parents"]) and (illness or serious):
+                row[0] = 1
+            if flags & bit["divorce"]:
+                row[1] = 1
+            if illness and one:
+                row[2] = 1
+            if illness and both:
+                row[3] = 1
+            if flags & bit["unemployed"] and one:
+                row[4] = 1
+            if flags & bit["unemployed"] and both:
+                row[5] = 1
+            if serious and flags & (bit["siblings"] | bit["sp_siblings"]):
+                row[6] = 1
+            if serious and one:
+                row[7] = 1
+            if serious and both:
+                row[8] = 1
+            if flags & bit["dead"] and one:
+                row[9] = 1
+
+
+def _clean_text(s: pd.Series) -> pd.Series:
+    """
+    原始数据中的文本列转为category类型并去掉换行。文本的重复很多，只需处理各个不同的取值，
+    之后的特征提取也直接使用category的编码
+
+    Args:
+        s: 文本列
+
+    Returns: category类型的pandas.Series
+
+    """
+    s = s.astype('category')
+    categories = s.cat.categories
+    if not categories.str.contains('\n', regex=False).any():
+        return s
+    table = np.append(categories.str.replace('\n', '', regex=False).to_numpy(dtype=object), np.nan)
+    return pd.Series(table[s.cat.codes.to_numpy()], index=s.index, name=s.name).astype('category')
+
+
+def _raw_columns(filename: str, encode: str) -> list:
+    """
+    原始文件中生成特征和标签需要用到的列，按文件中的顺序
+
+    Args:
+        filename: 文件路径
+        encode: 文件编码
+
+    Returns: 列名的list
+
+    """
+    header = pd.read_csv(filename, encoding=encode, nrows=0).columns
+    return [c for c in header if c in RAW_COLUMNS]
+
+
+def read_raw(filename: str, encode='gbk', engine: str = 'auto') -> pd.DataFrame:
+    """
+    读入原始数据，只读取生成特征和标签需要的列（见RAW_COLUMNS）
+
+    Args:
+        filename: 文件路径
+        encode: 文件编码
+        engine: 'pyarrow'使用pyarrow多线程解析，边读边转码；'c'使用pandas默认的解析器；
+            'auto'在安装了pyarrow时使用pyarrow，否则使用'c'
+
+    Returns: pandas.DataFrame
+
+    """
+    usecols = _raw_columns(filename, encode)
+    if engine == 'auto':
+        try:
+            import pyarrow  # noqa: F401
+            engine = 'pyarrow'
+        except ImportError:
+            engine = 'c'
+    if engine != 'pyarrow':
+        return pd.read_csv(filename, encoding=encode, usecols=usecols, engine=engine)
+    from pyarrow import csv
+    table = csv.read_csv(
+        filename,
+        read_options=csv.ReadOptions(encoding=encode, use_threads=True),
+        # 原始数据的单元格中有换行
+        parse_options=csv.ParseOptions(newlines_in_values=True),
+        # 空字符串与pandas一样读为缺失值
+        convert_options=csv.ConvertOptions(include_columns=usecols, strings_can_be_null=True)
+    )
+    return table.to_pandas()
 
 
 class DataSet:
@@ -8,7 +359,9 @@ class DataSet:
     数据处理的工具类
     """
 
-    def __init__(self, filename: str = None, encode='gbk'):
+    __slots__ = ['features_name', '_buffer', '_stale', '_view', '_features', '_label', '_strong_label', '_matrix']
+
+    def __init__(self, filename: str = None, encode='gbk', engine: str = 'auto'):
         """
         导入一个数据集，将原始特征、弱标签和细化的强标签分为features, label, strong_label
         三个属性。label中特别困难为0，一般困难为1，不困难为2；strong_label将四个细化的困难级别
@@ -18,22 +371,296 @@ class DataSet:
         Args:
             filename: 文件路径
             encode: 文件编码
+            engine: 读取csv的引擎，见read_raw
         """
         self.features_name = {}
+        # 通过append追加数据时，数据存放在可增长的缓冲区里，用到features等属性时才转成pandas对象
+        self._buffer = None
+        self._stale = False
+        # 由split_by_weak_label等得到的数据集是父数据集的视图：(父数据集, 行号, 附加的特征列, 是否重新标号)，
+        # 没有用到的属性为None，用到时才从父数据集中取出
+        self._view = None
+        self._matrix = None
+        self._features = pd.DataFrame()
+        self._label = pd.Series(dtype='int64')
+        self._strong_label = pd.Series(dtype='int64')
         if filename is None:
-            self.features = pd.DataFrame()
-            self.label = pd.Series()
             return
-        data = pd.read_csv(filename, encoding=encode)
-        data = data.apply(lambda x: x.replace("\n", ""))
+        self._load_raw(read_raw(filename, encode, engine))
+
+    def _sync(self):
+        if self._stale:
+            self._features, self._label, self._strong_label = self._buffer.frames()
+            self._stale = False
+
+    def _detach(self):
+        # 直接给属性赋值后缓冲区不再是最新的数据，丢弃
+        self._sync()
+        self._buffer = None
+
+    def _from_view(self, attr: str):
+        parent, rows, extra, reset = self._view
+        v = getattr(parent, attr).iloc[rows]
+        if attr == 'features' and extra:
+            v = v.assign(**extra)
+        if reset:
+            v = v.reset_index(drop=True)
+        setattr(self, '_' + attr, v)
+        if attr == 'features' and self._matrix is not None and self._matrix[0] is self._view:
+            # 已经从父数据集取出的矩阵继续有效
+            self._matrix = (v,) + self._matrix[1:]
+        if self._features is not None and self._label is not None and self._strong_label is not None:
+            self._view = None
+        return v
+
+    @property
+    def features(self) -> pd.DataFrame:
+        self._sync()
+        return self._from_view('features') if self._features is None else self._features
+
+    @features.setter
+    def features(self, value: pd.DataFrame):
+        self._detach()
+        self._features = value
+
+    @property
+    def label(self) -> pd.Series:
+        self._sync()
+        return self._from_view('label') if self._label is None else self._label
+
+    @label.setter
+    def label(self, value: pd.Series):
+        self._detach()
+        self._label = value
+
+    @property
+    def strong_label(self) -> pd.Series:
+        self._sync()
+        return self._from_view('strong_label') if self._strong_label is None else self._strong_label
+
+    @strong_label.setter
+    def strong_label(self, value: pd.Series):
+        self._detach()
+        self._strong_label = value
+
+    def __len__(self):
+        if self._buffer is not None:
+            return len(self._buffer)
+        if self._features is None:
+            return len(self._view[1])
+        return len(self._features)
+
+    def matrix(self, dtype='float64') -> np.ndarray:
+        """
+        特征矩阵，C顺序连续存放的numpy数组，直接交给scikit-learn的模型，
+        省去网格搜索中每次fit、predict都把DataFrame转换一遍。
+        结果会缓存，features被重新赋值或追加数据后重新生成；视图数据集直接从父数据集的矩阵中取出对应的行
+
+        Notes: 原地修改features中的数值后缓存不会更新，需要重新给features赋值
+
+        Args:
+            dtype: 矩阵的数值类型
+
+        Returns: numpy.ndarray，形状为(样本数, 特征数)
+
+        """
+        self._sync()
+        dtype = np.dtype(dtype)
+        key = self._view if self._features is None else self._features
+        if self._matrix is None or self._matrix[0] is not key or self._matrix[1] != dtype:
+            if key is self._view:
+                parent, rows, extra, _ = self._view
+                m = parent.matrix(dtype)[rows]
+                if extra:
+                    m = np.column_stack([m] + [np.asarray(v, dtype=dtype) for v in extra.values()])
+            else:
+                m = key.to_numpy(dtype=dtype)
+            self._matrix = (key, dtype, np.ascontiguousarray(m))
+        return self._matrix[2]
+
+    def take(self, rows, extra: dict = None, reset_index: bool = True):
+        """
+        按位置取出部分行，返回视图数据集，不复制特征和标签，用到时才从当前数据集中取出
+
+        Args:
+            rows: 行号数组或与数据等长的布尔数组
+            extra: 附加到特征最后的列，{特征编号: 与取出的行等长的数组}
+            reset_index: 是否重新标号，为False时保留原来的索引
+
+        Returns: DataSet对象
+
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        extra = dict(extra or {})
+        d = DataSet()
+        d.features_name = dict(self.features_name)
+        self._sync()
+        pure = self._features is None and self._label is None and self._strong_label is None
+        # 当前视图已重新标号而新视图要保留索引时，索引只能取当前视图的，不能直接指向最初的数据集
+        if pure and (reset_index or not self._view[3]):
+            # 视图的视图直接指向最初的数据集
+            parent, base, base_extra, _ = self._view
+            extra = dict({k: np.asarray(v)[rows] for k, v in base_extra.items()}, **extra)
+            rows = base[rows]
+        else:
+            # 记下当前的数据，之后当前数据集的属性被重新赋值不会影响视图
+            parent = DataSet()
+            parent._features, parent._label, parent._strong_label = self.features, self.label, self.strong_label
+            parent._matrix = self._matrix
+        d._features = d._label = d._strong_label = None
+        d._view = (parent, rows, extra, reset_index)
+        return d
+
+    def group_by(self, by: str = 'label', reset_index: bool = True) -> dict:
+        """
+        按标签一次把数据集分成若干组，每组都是视图数据集
+
+        Args:
+            by: 'label'或'strong_label'
+            reset_index: 各组是否重新标号
+
+        Returns: {标签值: DataSet}，按标签值从小到大排列
+
+        """
+        values, inverse = np.unique(getattr(self, by).to_numpy(), return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(values)))[:-1])
+        return {v: self.take(g, reset_index=reset_index) for v, g in zip(values.tolist(), groups)}
+
+    @classmethod
+    def cached(cls, filename: str, encode='gbk', cache_dir: str = 'data/.feature_cache'):
+        """
+        读入数据并生成特征，结果按文件内容和特征提取代码的版本缓存，再次读取同一文件时直接返回缓存
+
+        Args:
+            filename: 文件路径
+            encode: 文件编码
+            cache_dir: 缓存目录
+
+        Returns: 生成好特征的DataSet
+
+        """
+        cache = FeatureCache(cache_dir)
+        key = cache.key(filename, encode=encode)
+        hit = cache.get(key)
+        if hit is None:
+            d = cls(filename, encode)
+            d.generate_feature()
+            cache.put(key, d.features, d.label, d.strong_label, d.features_name)
+        else:
+            d = cls()
+            d.features, d.label, d.strong_label, d.features_name = hit
+        return d
+
+    def save(self, path: str):
+        """
+        按列保存到目录中（格式见MLSR.store.ColumnStore），已有的目录会被替换
+
+        Args:
+            path: 保存目录
+
+        """
+        save_store(path, self.features, self.label, self.strong_label, self.features_name)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True):
+        """
+        读取DataSet.save保存的数据集。mmap为True时每一列都是只读的numpy.memmap，
+        用到哪一列才从磁盘读入哪一列。特征矩阵由matrix()生成，交给GridSearchCV时joblib会把它映射给各个进程
+
+        Args:
+            path: 保存目录
+            mmap: 是否用内存映射读取
+
+        Returns: DataSet对象
+
+        """
+        if not os.path.exists(os.path.join(path, ColumnStore.META)):
+            raise FileNotFoundError(path)
+        d = DataSet()
+        d.features, d.label, d.strong_label, d.features_name = ColumnStore(path).read(mmap)
+        return d
+
+    def _load_raw(self, data: pd.DataFrame):
+        """
+        整理读入的原始数据，分出features, label, strong_label
+
+        Args:
+            data: 原始数据
+
+        """
+        for col in data.columns:
+            if pd.api.types.is_string_dtype(data[col]):
+                data[col] = _clean_text(data[col])
         if '专家判定等级' in data.columns:
             self.strong_label = data['专家判定等级'] - 1
             self.label = self.strong_label // 2
         else:
             self.strong_label = pd.Series([-1] * len(data))
-            self.label = data['院系认定贫困类型'].apply(lambda x: 0 if '特' in x else 1)
+            special = data['院系认定贫困类型'].str.contains('特', regex=False).fillna(False).astype(bool)
+            self.label = pd.Series(np.where(special, 0, 1), index=data.index)
         self.features = data.drop(['院系认定贫困类型', '专家判定等级'], axis=1, errors='ignore')
 
+    @staticmethod
+    def iter_chunks(filename: str, chunksize: int = 50000, encode='gbk', store: str = None, **kwargs):
+        """
+        分块读取很大的原始数据，每块单独整理并生成特征，内存占用只与chunksize有关
+
+        Args:
+            filename: 文件路径
+            chunksize: 每块的行数
+            encode: 文件编码
+            store: 列存储目录，不为空时每块生成的特征依次写入，见MLSR.store.ColumnStore；
+                目录中已有的数据会先被清空，重复运行不会重复写入
+            **kwargs: 传给generate_feature的参数
+
+        Returns: 生成器，依次产生每块生成好特征的DataSet
+
+        """
+        column_store = ColumnStore(store) if store is not None else None
+        if column_store is not None:
+            column_store.clear()
+        usecols = _raw_columns(filename, encode)
+        for data in pd.read_csv(filename, encoding=encode, chunksize=chunksize, usecols=usecols):
+            d = DataSet()
+            d._load_raw(data.reset_index(drop=True))
+            d.generate_feature(**kwargs)
+            if column_store is not None:
+                column_store.append(d.features, d.label, d.strong_label, d.features_name)
+            yield d
+
+    def append(self, y, encode='gbk', **kwargs):
+        """
+        将新的一批数据追加到当前的DataSet尾部，只对新数据生成特征。
+        数据存放在预先分配、容量按倍数增长的缓冲区中，连续追加时每次的代价只与新数据的行数有关
+
+        Args:
+            y: 要加入的DataSet，或者原始数据文件的路径（读入后生成特征再加入）
+            encode: y为文件路径时的文件编码
+            **kwargs: y为文件路径时传给generate_feature的参数
+
+        Returns: self
+
+        """
+        if isinstance(y, str):
+            y = DataSet(y, encode)
+            y.generate_feature(**kwargs)
+        if len(y) == 0:
+            return self
+        if self._buffer is None:
+            if len(self) == 0 and len(self.features.columns) == 0:
+                self.features_name = dict(y.features_name)
+                self._buffer = ColumnBuffer.concat([(y.features, y.label, y.strong_label)])
+                self._stale = True
+                return self
+            self._buffer = ColumnBuffer.concat([(self.features, self.label, self.strong_label)])
+            self._view = None
+        self._buffer.extend(y.features, y.label, y.strong_label)
+        self._stale = True
+        return self
+
     def merge(self, y):
         """
         将一个DataSet加入当前的DataSet尾部
@@ -41,13 +668,31 @@ class DataSet:
         Args:
             y: 要加入的DataSet
 
+        Returns: 当前的DataSet
+
+        """
+        return self.append(y)
+
+    @staticmethod
+    def concat(datasets: list):
+        """
+        将多个DataSet依次拼接起来，返回一个新的数据集。所有数据只拷贝一次，
+        不像两两合并那样反复复制前面的数据
+
+        Args:
+            datasets: DataSet的列表，特征列须相同
+
         Returns: 新的DataSet
 
         """
-        self.features.append(y.features, ignore_index=True)
-        self.label.append(y.label, ignore_index=True)
-        self.strong_label.append(y.strong_label, ignore_index=True)
-        return self
+        z = DataSet()
+        datasets = [d for d in datasets if len(d)]
+        if not datasets:
+            return z
+        z.features_name = dict(datasets[0].features_name)
+        z._buffer = ColumnBuffer.concat([(d.features, d.label, d.strong_label) for d in datasets])
+        z._stale = True
+        return z
 
     @staticmethod
     def static_merge(x, y):
@@ -60,66 +705,53 @@ class DataSet:
 
         Returns: 新的DataSet
         """
-        z = DataSet()
-        z.features_name = x.features_name
-        z.features = pd.concat([x.features, y.features], ignore_index=True)
-        z.label = pd.concat([x.label, y.label], ignore_index=True)
-        z.strong_label = pd.concat([x.strong_label, y.strong_label], ignore_index=True)
-        return z
+        return DataSet.concat([x, y])
 
     def split_by_weak_label(self, reset_index: bool = True):
         """
-        将初次分类的得到的结果中，评为特别困难和一般困难的分开挑出来
+        将初次分类的得到的结果中，评为特别困难和一般困难的分开挑出来，两者都是当前数据集的视图，不复制数据
 
         Returns: (DataSet, DataSet) 两个DataSet对象，第一个是特别困难，第二个是一般困难
 
         """
-        x0 = DataSet()
-        x1 = DataSet()
-        index = self.label[self.label == 0].index
-        x0.features = self.features.take(index)
-        x0.label = self.label.take(index)
-        x0.strong_label = self.strong_label.take(index)
-        index = self.label[self.label == 1].index
-        x1.features = self.features.take(index)
-        x1.label = self.label.take(index)
-        x1.strong_label = self.strong_label.take(index)
-        x0.features_name = self.features_name
-        x1.features_name = self.features_name
-        if reset_index:
-            return x0.reset_index(), x1.reset_index()
-        else:
-            return x0, x1
+        label = self.label.to_numpy()
+        return self.take(label == 0, reset_index=reset_index), self.take(label == 1, reset_index=reset_index)
 
     def reset_index(self):
         """
         将数据及重新标号
 
-        Notes: 调用pandas.reset_index时inplace为True
+        Notes: 直接修改当前的DataSet
 
         Returns: 重新标号后的DataSet
 
         """
-        self.features.reset_index(drop=True, inplace=True)
-        self.label.reset_index(drop=True, inplace=True)
-        self.strong_label.reset_index(drop=True, inplace=True)
+        self._sync()
+        if self._view is not None:
+            parent, rows, extra, _ = self._view
+            self._view = (parent, rows, extra, True)
+        for attr in ['_features', '_label', '_strong_label']:
+            v = getattr(self, attr)
+            if v is not None:
+                setattr(self, attr, v.reset_index(drop=True))
         return self
 
     def convert_to_ssl(self):
         """将数据集转为半监督任务用的数据集
-        将弱标签作为一个新的特征，并且删去非困难的数据
+        将弱标签作为一个新的特征，并且删去非困难的数据。当前数据集变为原数据的视图，不复制数据
 
         Returns: DataSet对象
 
         """
-        len_name = len(self.features_name)
-        self.features_name['f'+str(len_name)] = '院系认定贫困类型'
-        self.features['f'+str(len_name)] = self.label
-        index = self.label[self.label == 2].index
-        self.features.drop(index, inplace=True)
-        self.label.drop(index, inplace=True)
-        self.strong_label.drop(index, inplace=True)
-        return self.reset_index()
+        # 编号排在全部特征之后，与生成全部特征时相同；只生成部分特征时也不会与已有的编号重复
+        name = 'f' + str(len(FEATURE_NAMES))
+        label = self.label.to_numpy()
+        rows = np.flatnonzero(label != 2)
+        view = self.take(rows, extra={name: label[rows]})
+        view.features_name[name] = SSL_FEATURE
+        for attr in DataSet.__slots__:
+            setattr(self, attr, getattr(view, attr))
+        return self
 
     @staticmethod
     @DeprecationWarning
@@ -177,380 +809,67 @@ class DataSet:
         Returns:pandas.DataFrame,分类哑变量
 
         """
-        d = pd.DataFrame()
-        d["建档立卡贫困户"] = data["享受国家政策资助情况"].str.contains("立卡", na=False)
-        d["城乡低保户"] = data["享受国家政策资助情况"].str.contains("低保", na=False)
+        d = _POLICY_MATCHER.transform(data["享受国家政策资助情况"])
         if '家庭主要经济来源' in data.columns:
-            d['城乡低保户'] |= data['家庭主要经济来源'].str.contains('低保|最低生活保障', na=False)
-        d["五保户"] = data["享受国家政策资助情况"].str.contains("五保", na=False)
-        d["孤残学生"] = data["享受国家政策资助情况"].str.contains("孤残", na=False)
+            d['城乡低保户'] |= _INCOME_MATCHER.transform(data['家庭主要经济来源'])['低保']
         if '突发事件情况' in data.columns:
-            d['孤残学生'] |= data["突发事件情况"].str.contains("父母双亡|父母去世|孤残|孤儿|重大疾病、突发意外致残|本人视力残疾|本人严重烫伤", na=False)
-        d["军烈属或优抚子女"] = data["享受国家政策资助情况"].str.contains("军烈属", na=False)
+            d['孤残学生'] |= _ORPHAN_MATCHER.transform(data["突发事件情况"])['孤残学生']
         return d
 
     @staticmethod
-    def do_income(data: pd.DataFrame, fill_to_no_income: bool = True) -> pd.DataFrame:
+    def do_income(data: pd.DataFrame) -> pd.DataFrame:
         """
         家庭主要经济来源
+        所有关键字表编译成一个匹配器，每个字符串只扫描一遍，缺失值各项均为False
 
         Args:
             data:
-            fill_to_no_income:
 
         Returns:
 
         """
-        d = pd.DataFrame()
-        d["家庭主要经济来源"] = data["家庭主要经济来源"]
-        if fill_to_no_income:
-            d["家庭主要经济来源"].fillna('父母均下岗', inplace=True)
-        business_str = '生意|经营|从商|经商|地摊|摆摊|杂货铺|店|卖|' + \
-                       '买|个体|餐|理发|手工|个体|水果摊|蒸馒头|股票'
-        d['经商'] = data['家庭主要经济来源'].str.contains(business_str, na=False)
-
-        farm_str = '务农|农作|农民|农收|农业|农务|农村|农活|耕|种植|种地|' + \
-                   '种粮|庄稼|田|农产品|土地|葡萄|果树|果园|畜|玉米|梨园|牧|养殖|苹果|枣'
-        d['务农'] = data['家庭主要经济来源'].str.contains(farm_str, na=False)
-
-        retire_str = '退休|养老|退养|病休|内退|病退|退职'
-        d['退休'] = data['家庭主要经济来源'].str.contains(retire_str, na=False)
-
-        low_str = '低保|最低生活保障'
-        d['低保'] = data['家庭主要经济来源'].str.contains(low_str, na=False)
-
-        work_list = [
-            '城镇', '父母劳作', '家长工资', '父亲、母亲', '父母微薄收入', '工薪', '基本工资',
-            '职工工资', '父母工资', '父母工作收入', '父母', '工作', '父母工作', '父母收入',
-            '工资收入', '工资'
-        ]
-        work_str = '打工|务工|农民工|工地|零工|临时工|工人|临工|短工|小工|散工|' + \
-                   '出租车|货车|教师|苦力|司机|体力劳动|保安|看守|送货|公交车|裁缝|' + \
-                   '保姆|上班|工活|教书|清洁工|营业员|城市|普通职工|诊所|超市工作|' + \
-                   '跑保险|打杂|干活|杂工|十字绣|代教|职员|瓷砖|看门|建房子|职工|' + \
-                   '房屋出租|房租|自由职业|副业|父母工资收入|父母劳动收入|劳务报酬|' + \
-                   '父母的工资|做工|劳动收入|卫生所从医|工作收入|不固定|不稳定|' + \
-                   '无稳定|非固定|非稳定|无固定|没有固定'
-        d['打工'] = data['家庭主要经济来源'].apply(lambda x: True if x in work_list else False)
-        d['打工'] |= data['家庭主要经济来源'].str.contains(work_str, na=False)
-
-        both_unemployed_list = [
-            '未写', '暂无', '无', '兄长', '姐姐的工资', '哥哥工作', '姐姐 哥哥',
-            '姐姐的工资收入', '哥哥工资', '本人及奶奶的低保金', '姐姐工资', '现靠父母过去的工资',
-            '靠姑姑接济', '父亲无固定工作，现停业在家\n母亲一直无工作'
-        ]
-        both_unemployed_str = '父母无业|双方失业|父母均无业|父母下岗|均下岗|双下岗|' + \
-                              '亲友|接济|救济|资助|勤工俭学|经济扶持|补助|补贴|' + \
-                              '寄养家庭|父母离岗工资|社保'
-        d['父母均下岗'] = data['家庭主要经济来源'].apply(lambda x: True if x in both_unemployed_list else False)
-        d['父母均下岗'] |= data['家庭主要经济来源'].str.contains(both_unemployed_str, na=False)
-
-        one_unemployed_list = [
-            '父母一方下岗', '父亲每月工资', '母亲基本工资', '父亲的薪水', '父亲基本工资',
-            '父亲和兄长收入', '父亲姐姐工资', '母亲单位工资', '父亲上岗', '父亲劳务派遣',
-            '父亲固定工资收入', '父亲个人工资', '父亲微薄工资', '4050公益岗位收入', '父兄工资',
-            '爸爸', '父亲的收入', '父亲的工作', '父亲', '母亲'
-        ]
-        one_unemployed_str = '一方|母亲固定收入|父亲固定收入|母亲下岗|父亲下岗|' + \
-                             '父亲失业|母亲失业|一人工资|一人的工资|爸爸工资|妈妈工资|' + \
-                             '爸爸的工资|妈妈的工资|父亲的工资|父亲工资|母亲的工资|' + \
-                             '母亲工资|父亲工作|母亲工作|爸爸工作|妈妈工作|父亲上班|' + \
-                             '母亲上班|父亲收入|母亲收入|父亲无业'
-        d['父母一方下岗'] = data['家庭主要经济来源'].apply(lambda x: True if x in one_unemployed_list else False)
-        d['父母一方下岗'] |= data['家庭主要经济来源'].str.contains(one_unemployed_str, na=False)
+        d = _INCOME_MATCHER.transform(data['家庭主要经济来源'])
         d['家庭人均年收入'] = data['家庭人均年收入']
-        d.drop('家庭主要经济来源', inplace=True, axis=1, errors='ignore')
         return d
 
     @staticmethod
-    def do_education(s: pd.Series) -> pd.DataFrame:
+    def do_education(s: pd.Series, tokenizer: CachedTokenizer = None, n_jobs: int = 1,
+                     chunksize: int = 20000) -> pd.DataFrame:
         """
-        对每一行用jieba进行分词，对结果进行遍历，搜索关键词并记录其词性，记为cut_type
+        对每一行用jieba进行分词，每个词查一次词表得到其词性（整数编号），记为cut_type
         在cut_type中找寻如下pattern，并总结出大学阶段、高中阶段、义务教育阶段各有多少人：
         个数和家庭成员都有可能出现，但个数为家庭成员前一个词，因此先检测个数再紧跟着检测家庭成员
         年级和学校都有可能出现，但年级一定出现在学校之后，因此先检测学校再检测年级
         个数 -> 学校/年级/学校&年级 -> 非学校或年级：这几个人都属于该学校
         （个数 ->）家庭成员 -> 学校/年级/学校&年级 -> 非学校或年级：这几个人都属于该学校
         （个数 ->）家庭成员 -> 学校/年级/学校&年级 -> 学校/年级/学校&年级 -> 非学校或年级：首先保证两个学校阶段相同，则这种家庭成员分别属于这个阶段；否则人工处理
+        匹配规则见_education_counts，每个不同的字符串只处理一次，所有字符串一起分词成整数编号的数组
 
         Args:
             s: 输入的pandas.Series
+            tokenizer: 分词器，不填则使用共用的带缓存分词器
+            n_jobs: 分词的进程数，见MLSR.tokenizer.segment
+            chunksize: 并行分词时每块的字符串个数，见MLSR.tokenizer.segment
 
         Returns:
 
         """
-        s = s.fillna('无')
-        zero_tmp1 = ['暂无', '独生', '无在读', '无在受', '无其他', '无成员', '无高中', '无正在']
-        zero_tmp2 = ['0', '0人', '0人在读高中或大学']
-
-        def zero_fun(x):
-            if x in zero_tmp2:
-                return True
-            else:
-                for _i in zero_tmp1:
-                    if _i in x:
-                        return True
-            return False
-
-        s = s.apply(lambda x: '无' if zero_fun(x) else x)
-
-        # 创建关键字
-        number1 = {"一个", "1个", "一人", "1人", "一位", "1位"}
-        number2 = {"两个", "2个", "两人", "2人", "二人", "两位", "2位", "二位"}
-        number3 = {"三个", "3个", "三人", "3人", "三位", "3位"}
-        number4 = {"四个", "4个", "四人", "4人", "四位", "4位"}
-
-        member = {"哥哥", "姐姐", "弟弟", "妹妹", "侄女", "侄子"}
-        sp_member = {"哥", "兄", "姐", "弟", "妹", "大哥", "二哥", "大弟", "二弟", "三弟", "四弟", "五弟", "小弟", "大姐", "长姐", "二姐", "三姐",
-                     "大妹", "小妹", "二妹", "三妹", "四妹"}
-        invalid_member = {"爸爸", "父亲", "妈妈", "母亲", "爷爷", "奶奶", "外祖父", "外祖母", "姥爷", "姥姥", "伯伯", "婆婆", "外公", "外婆"}
-        invalid_sp_member = {"爸", "妈", "爷", "奶", "祖父", "祖母", "父", "母"}
-
-        grad = {"幼儿园毕业", "刚毕业", "小学毕业", "小学未毕业", "初中毕业", "初中未毕业", "高中毕业", "大专毕业", "专科毕业", "大学毕业", "三本毕业",
-                "应届毕业", "大学已毕业", "大学刚毕业", "本科毕业", "研究生毕业", "硕士毕业", "博士毕业"}
-        sp_grad = {"毕业", "未受教育", "未接受教育", "文盲", "无学历", "没上过学", "肄业", "未上学"}
-        college = {"研究生", "读研", "博士", "硕士", "大学", "本科", "专升本", "大学生", "河工大"}
-        sp_college = {"考研", "大专", "学院", "高职", "专科", "职业技术学校"}
-        gr_college = {"大一", "大二", "大三", "大四", "研一", "研二", "研三", "博二", "读博"}
-        high_school = {"高中", "高专", "职高", "职专", "职中", "中专", "中学", "职业高中"}
-        gr_high_school = {"高一", "高二", "高三", "高考"}
-
-        compulsory = {"初中", "小学"}
-        gr_compulsory = {"初一", "初二", "初三", "初中三年级", "一年级", "二年级", "三年级", "四年级", "五年级", "六年级", "七年级", "八年级", "九年级",
-                         "义务教育阶段"}
-        others = {"幼儿园", "学前班", "学前教育"}
-
-        # 手动检查了前200个数据，发现一些分词结果有误
-        suggest_word = [
-            '兄弟', '高二', '小学毕业', '初中毕业', '高中毕业', '职高毕业', '大学毕业',
-            '大专毕业', '1人', '1个', '1位', '2人', '2个', '2位', '3人', '3个',
-            '3位', '4人', '西安交通大学', '海南师范大学', '河工大',
-            '中国科学院', '北京航空航天大学', '北京大学', '义务教育阶段'
-        ]
-        suggest_split = [
-            ('父', '母'), ('兄', '妹'), ('兄', '妹'), ('姐', '弟'),
-            ('姐', '妹'), ('读', '高二'), ('中医药', '大学'), ('农', '学院')
-        ]
-        for i in suggest_word:
-            suggest_freq(tuple(i), True)
-        for i in suggest_split:
-            suggest_freq(i, True)
-
-        # 对每个字符串进行分词，并且找寻其中关键字，记录关键字的词性和位置
-        arr = zeros(shape=(len(s), 3))
-        df = pd.DataFrame(arr, columns=["大学", "高中", "义务教育"])
-        row = -1  # 记录str在s中的位置
-
-        for str_i in s:
-            row += 1
-            seg_list = cut(str_i, cut_all=False)  # 对每个字符串进行分词
-            output = list(seg_list)
-            cut_type = []  # 记录某个关键字的词性
-            cut_loc = []  # 记录某个关键字在str中的位置
-            loc = 0  # loc为某个词在原字符串中的位置(1~len)
-
-            for cut_i in output:  # cut为分词结果中的每个词
-                loc += 1
-                if cut_i in number1:
-                    cut_type.append("number1")
-                    cut_loc.append(loc - 1)  # cut在原字符串中的索引值(0~len-1)
-                elif cut_i in number2:
-                    cut_type.append("number2")
-                    cut_loc.append(loc - 1)
-                elif cut_i in number3:
-                    cut_type.append("number3")
-                    cut_loc.append(loc - 1)
-                elif cut_i in number4:
-                    cut_type.append("number4")
-                    cut_loc.append(loc - 1)
-                elif cut_i in member:
-                    cut_type.append("member")
-                    cut_loc.append(loc - 1)
-                elif cut_i in sp_member:
-                    cut_type.append("sp_member")
-                    cut_loc.append(loc - 1)
-                elif cut_i in invalid_member:
-                    cut_type.append("invalid_member")
-                    cut_loc.append(loc - 1)
-                elif cut_i in invalid_sp_member:
-                    cut_type.append("invalid_sp_member")
-                    cut_loc.append(loc - 1)
-                elif cut_i in grad:
-                    cut_type.append("grad")
-                    cut_loc.append(loc - 1)
-                elif cut_i in sp_grad:
-                    cut_type.append("sp_grad")
-                    cut_loc.append(loc - 1)
-                elif cut_i in college:
-                    cut_type.append("college")
-                    cut_loc.append(loc - 1)
-                elif cut_i in sp_college:
-                    cut_type.append("sp_college")
-                    cut_loc.append(loc - 1)
-                elif cut_i in gr_college:
-                    cut_type.append("gr_college")
-                    cut_loc.append(loc - 1)
-                elif cut_i in high_school:
-                    cut_type.append("high_school")
-                    cut_loc.append(loc - 1)
-                elif cut_i in gr_high_school:
-                    cut_type.append("gr_high_school")
-                    cut_loc.append(loc - 1)
-                elif cut_i in compulsory:
-                    cut_type.append("compulsory")
-                    cut_loc.append(loc - 1)
-                elif cut_i in gr_compulsory:
-                    cut_type.append("gr_compulsory")
-                    cut_loc.append(loc - 1)
-                elif cut_i in others:
-                    cut_type.append("others")
-                    cut_loc.append(loc - 1)
-
-            serial = 0
-            cut_type.append(" ")
-            cut_type.append(" ")  # 确保检测到最后一位也能检测其后两位的元素的词性
-            u_num = 0  # 大学生人数
-            h_num = 0  # 高中生人数
-            c_num = 0  # 义务教育人数
-            number = 0  # 待定的人数
-            while serial < len(cut_type) - 2:
-                current_group = []
-                # 每一个pattern起始的词只能为个数或家庭成员
-                if (cut_type[serial] in ["number1", "number2", "number3", "number4", "member", "sp_member",
-                                         "invalid_member", "invalid_sp_member"]):
-                    current_group.append(cut_type[serial])
-                    for forward in range(serial + 1, len(cut_type) - 1):  # 开始检测该pattern内后面的词
-                        current_group.append(cut_type[forward])
-                        if ((cut_type[forward] in [" ", "grad", "sp_grad", "college", "sp_college", "gr_college",
-                                                   "high_school", "gr_high_school", "compulsory", "gr_compulsory",
-                                                   "others"]) and (
-                                cut_type[forward + 1] in [" ", "number1", "number2", "number3", "number4", "member",
-                                                          "sp_member", "invalid_member", "invalid_sp_member"])):
-                            serial = forward + 1  # 找到学校或年级 -> 非学校或年级，这一组完成，定位至下一组首个词
-                            break
-
-                    # 此时一组已经检测完成，对其进行匹配
-                    group_serial = 0
-                    current_group.append(" ")
-                    current_group.append(" ")  # 确保检测到最后一位也能检测其后两位的元素是否为学校
-
-                    while group_serial < len(current_group) - 2:
-                        # 个数 -> 学校 -> 非学校或年级
-                        if ((current_group[group_serial] in ["number1", "number2", "number3", "number4"]) and (
-                                current_group[group_serial + 1] in ["college", "sp_college", "gr_college"])):
-                            if current_group[group_serial] == "number1":
-                                u_num += 1
-                            elif current_group[group_serial] == "number2":
-                                u_num += 2
-                            elif current_group[group_serial] == "number3":
-                                u_num += 3
-                            elif current_group[group_serial] == "number4":
-                                u_num += 4
-
-                        elif ((current_group[group_serial] in ["number1", "number2", "number3", "number4"]) and (
-                                current_group[group_serial + 1] in ["high_school", "gr_high_school"])):
-                            if current_group[group_serial] == "number1":
-                                h_num += 1
-                            elif current_group[group_serial] == "number2":
-                                h_num += 2
-                            elif current_group[group_serial] == "number3":
-                                h_num += 3
-                            elif current_group[group_serial] == "number4":
-                                h_num += 4
-
-                        elif ((current_group[group_serial] in ["number1", "number2", "number3", "number4"]) and (
-                                current_group[group_serial + 1] in ["compulsory", "gr_compulsory"])):
-                            if current_group[group_serial] == "number1":
-                                c_num += 1
-                            elif current_group[group_serial] == "number2":
-                                c_num += 2
-                            elif current_group[group_serial] == "number3":
-                                c_num += 3
-                            elif current_group[group_serial] == "number4":
-                                c_num += 4
-
-                        # (个数 ->) 家庭成员 -> 学校 -> 非学校
-                        elif ((current_group[group_serial] in ["member", "sp_member"]) and (
-                                current_group[group_serial + 1] in ["grad", "sp_grad", "college", "sp_college",
-                                                                    "gr_college", "high_school", "gr_high_school",
-                                                                    "compulsory", "gr_compulsory", "others"]) and (
-                                      current_group[group_serial + 2] not in ["grad", "sp_grad", "college",
-                                                                              "sp_college", "gr_college", "high_school",
-                                                                              "gr_high_school", "compulsory",
-                                                                              "gr_compulsory", "others"])):
-                            if current_group[group_serial - 1] == "number2":
-                                number += 2
-                            elif current_group[group_serial - 1] == "number3":
-                                number += 3
-                            elif current_group[group_serial - 1] == "number4":
-                                number += 4
-                            else:
-                                number += 1
-
-                            if current_group[group_serial + 1] in ["college", "sp_college", "gr_college"]:
-                                u_num += number
-                            elif current_group[group_serial + 1] in ["high_school", "gr_high_school"]:
-                                h_num += number
-                            elif current_group[group_serial + 1] in ["compulsory", "gr_compulsory"]:
-                                c_num += number
-
-                            number = 0
-
-                        # 家庭成员 -> 多个学校 -> 非学校
-                        elif ((current_group[group_serial] in ["member", "sp_member"]) and (
-                                current_group[group_serial + 1] in ["grad", "sp_grad", "college", "sp_college",
-                                                                    "gr_college", "high_school", "gr_high_school",
-                                                                    "compulsory", "gr_compulsory", "others"]) and (
-                                      current_group[group_serial + 2] in ["grad", "sp_grad", "college", "sp_college",
-                                                                          "gr_college", "high_school", "gr_high_school",
-                                                                          "compulsory", "gr_compulsory", "others"])):
-                            group_serial += 1
-                            while group_serial < len(current_group) - 2:
-                                if (current_group[group_serial] not in ["grad", "sp_grad", "college", "sp_college",
-                                                                        "gr_college", "high_school", "gr_high_school",
-                                                                        "compulsory", "gr_compulsory", "others"]):
-                                    break
-
-                                elif current_group[group_serial] in ["college", "sp_college", "gr_college"]:
-                                    u_num += 1
-                                elif current_group[group_serial] in ["high_school", "gr_high_school"]:
-                                    h_num += 1
-                                elif current_group[group_serial] in ["compulsory", "gr_compulsory"]:
-                                    c_num += 1
-                                group_serial += 1
-
-                        # 多个家庭成员 -> 学校 -> 非学校
-                        elif ((current_group[group_serial] in ["member", "sp_member"]) and (
-                                current_group[group_serial + 1] in ["member", "sp_member", "invalid_member",
-                                                                    "invalid_sp_member"])):
-                            group_serial += 1
-                            while group_serial < len(current_group) - 2:
-                                if (current_group[group_serial] not in ["member", "sp_member", "invalid_member",
-                                                                        "invalid_sp_member"]):
-                                    break
-                                elif current_group[group_serial] in ["member", "sp_member"]:
-                                    number += 1
-                                group_serial += 1
-
-                            if current_group[group_serial] in ["college", "sp_college", "gr_college"]:
-                                u_num += number
-                            elif current_group[group_serial] in ["high_school", "gr_high_school"]:
-                                h_num += number
-                            elif current_group[group_serial] in ["compulsory", "gr_compulsory"]:
-                                c_num += number
-
-                            number = 0
-
-                        group_serial += 1
-
-                else:  # 该词不为个数或家庭成员，则访问下一个
-                    serial += 1
-
-            df.iloc[row] = [u_num, h_num, c_num]
-        return df
+        def func(values):
+            res = np.zeros((len(values), 3), dtype='float64')
+            rows = [i for i, x in enumerate(values)
+                    if not (x in EDUCATION_ZERO_EXACT or any(i in x for i in EDUCATION_ZERO_CONTAINS))]
+            ids, offsets = segment([values[i] for i in rows], _EDU_VOCAB, tokenizer, n_jobs, chunksize)
+            ids, offsets = ids.tolist(), offsets.tolist()
+            for k, i in enumerate(rows):
+                res[i] = _education_counts([t for t in ids[offsets[k]:offsets[k + 1]] if t])
+            return res
+
+        arr = _broadcast(s, func, '无', 'float64', batch=True)
+        return pd.DataFrame(arr, index=s.index, columns=["大学", "高中", "义务教育"])
 
     @staticmethod
-    def do_accident(s: pd.Series):
+    def do_accident(s: pd.Series, tokenizer: CachedTokenizer = None, n_jobs: int = 1,
+                    chunksize: int = 20000):
         """
         识别突发事件情况
         部分处理思路如下：
@@ -560,302 +879,30 @@ class DataSet:
         这里jieba无法将“父母”、“父/母”、“父(母)”、“父亲（母亲）”分开，所以需要加一个判断条件，会用在后面无业、患病、去世中
         一个人之后可能跟着多个illness，应全部与其绑定。若人是祖父母，则统计其是否患病；父母则看是否有重病，且应将父母辨别开；兄弟姐妹只统计重疾。
         有可能出现人 -> illness ->dead。所有人都有可能dead，dead需要与之前最近的一个人或连续的多个人绑定，但只统计父或母去世。
+        结果直接写入预先分配的uint8矩阵，每个不同的字符串只处理一次，所有字符串一起分词成整数编号的数组，
+        自然灾害一列整列一次匹配
 
         Args:
             s:待处理的pandas.Series
+            tokenizer: 分词器，不填则使用共用的带缓存分词器
+            n_jobs: 分词的进程数，见MLSR.tokenizer.segment
+            chunksize: 并行分词时每块的字符串个数，见MLSR.tokenizer.segment
 
         Returns:处理后得到的哑变量特征，pandas.Dataframe格式
 
         """
-        s = s.fillna('无')
-        zero_tmp1 = ['无', '否', '没有', '正常', '暂无']
-        s = s.apply(lambda x: '无' if x in zero_tmp1 else x)
-
-        # 创建关键字
-        dad = {"爸爸", "父亲", "爸", "父"}
-        mom = {"妈妈", "母亲", "妈", "母"}
-        grand_parents = {"老人", "长辈", "祖父母", "爷爷", "奶奶", "外祖父", "外祖母",
-                         "姥爷", "姥姥", "外公", "外婆"}
-        sp_grand_parents = {"爷", "奶", "祖父", "祖母"}
-        siblings = {"哥哥", "姐姐", "弟弟", "妹妹"}
-        sp_siblings = {"哥", "兄", "姐", "弟", "妹", "大哥", "二哥", "大弟",
-                       "二弟", "三弟", "四弟", "五弟", "小弟", "大姐", "长姐",
-                       "二姐", "三姐", "大妹", "小妹", "二妹", "三妹", "四妹"}
-        invalid_member = {"我", "本人", "自己", "侄女", "侄子", "伯伯", "伯母",
-                          "大伯", "二伯", "三伯", "伯父", "婆婆", "舅舅", "小姑",
-                          "姑姑", "二姑", "大舅", "叔叔", "叔父", "二叔", "老叔", "舅妈"}
-        divorce = {"单亲", "离婚", "离异"}
-        unemployed = {"无业", "一方无业", "均无业", "失业", "无法工作", "下岗",
-                      "公司破产", "无工作", "待业", "倒闭", "离职", "未有收入",
-                      "无收入", "停产", "失去稳定工作", "没能工作"}
-        dead = {"去世", "离世", "病逝", "死亡", "治丧", "身亡", "病故"}
-        illness = {
-            "病", "病了", "就医", "发病", "有病", "多病", "车祸", "住院", "养病", "疾病",
-            "病情", "受伤", "顽疾", "服药", "腰伤", "慢性疾病", "普通疾病", "一般疾病",
-            "生病", "患病", "带病", "患疾", "皮肤病", "高血压", "高血糖", "高血脂",
-            "风湿", "类风湿", "风湿病", "心脏病", "糖尿病", "高血脂", "三高", "囊肿",
-            "肝囊肿", "结石", "肾结石", "胆结石", "结石病", "尿结石", "肾囊肿",
-            "肾积水", "脑溢血", "脑血栓", "心脑血管疾病", "心脑疾病", "青光眼", "慢阻肺",
-            "中风", "白内障", "肺结核", "冠心病", "甲亢", "癫痫", "股骨头坏死",
-            "风湿", "腿脚不便", "精神病", "精神疾病", "精神分裂症", "精神性疾病", "气胸",
-            "胃穿孔", "骨折", "骨裂", "红斑狼疮", "腰椎间盘突出", "腰间盘突出", "关节炎",
-            "骨质增生", "胃溃疡", "手术", "腿疾", "胃病", "感染", "胰腺炎", "溃烂",
-            "摔伤", "腿伤", "睡眠障碍", "工伤", "视网膜", "白癜风", "关节病", "颈椎病",
-            "胆囊炎", "坠楼", "瘸", "贫血", "脱髓鞘", "事故", "意外事故", "服药", "体弱",
-            "卷入机器", "气管炎", "支气管炎", "卧病", "交通事故", "吃药", "胃出血",
-            "脑出血", "颅内出血", "子宫肌瘤", "腰椎", "颈椎", "腰椎病", "后遗症",
-            "割伤", "脑垂体瘤", "脊椎炎", "扎伤", "烫伤", "肺气肿", "卧床", "断裂",
-            "眼疾", "伤手", "摔了", "吃药", "旧病复发", "切断", "摔到", "意外事故"}
-        serious_illness = {
-            "大病", "病重", "重病", "重疾", "重大疾病", "肌无力", "肿瘤", "瘤", "白血病",
-            "癌", "患癌", "癌症", "肝癌", "食道癌", "卵巢癌", "甲状腺癌", "肺癌", "宫颈癌",
-            "脑癌", "直肠癌", "乳腺癌", "胃癌", "肺腺癌", "贲门癌", "喷门癌", "食道癌",
-            "肠癌", "乳癌", "结肠癌", "前列腺癌", "致癌", "肾癌", "淋巴癌", "食道癌",
-            "心梗", "心肌梗塞", "脑中风", "移植", "搭桥", "支架", "肾炎", "肾病综合征",
-            "肾综合", "严重肾病", "肾衰竭", "尿毒症", "截肢", "肝病", "肝硬化", "肝炎",
-            "干重活", "做重活", "不能工作", "失去劳动力", "丧失劳动力", "丧失行动力",
-            "无法劳作", "丧失劳动能力", "失去部分劳动力", "失去全部劳动力", "无法承受过重劳动",
-            "失去行动能力", "干不了", "干重活", "不能劳作", "不得剧烈运动", "脑梗", "脑梗塞",
-            "脑梗死", "脑膜炎", "脑膜瘤", "昏迷", "聋", "失聪", "耳聋", "聋哑人", "聋哑",
-            "失明", "瘫痪", "偏瘫", "脑瘫", "截瘫", "致瘫", "帕金森", "瓣膜病", "痴呆",
-            "老年痴呆", "老年痴呆症", "烧伤", "火烧", "语言", "贫血", "主动脉", "残疾",
-            "残废", "伤残", "摔断", "砸断", "神志不清", "骨髓瘤", "致残", "脑萎缩", "脑血管",
-            "脑结核", "半身不遂", "致盲", "病危", "再生性贫血障碍", "生活无法自理", "做手术"
-        }
-
-        suggest_word = [
-            '严重肾病', '肾病综合征', '失去劳动力', '丧失劳动力', '丧失行动力',
-            '无法劳作', '不能劳作', '失去部分劳动力', '失去部分劳动力', '失去行动能力',
-            '丧失劳动能力', '无法承受过重劳动', '心脑血管疾病', '心脑疾病', '肺腺癌',
-            '脑梗', '不得剧烈运动', '重大疾病', '普通疾病', '一般疾病', '一方无业',
-            '均无业', '股骨头坏死', '干重活', '做重活', '腿脚不便', '无法工作', '工作',
-            '精神性疾病', '精神官能症', '公司破产', '腰椎间盘突出', '腰间盘突出', '腿疾',
-            '无工作', '慢性疾病', '睡眠障碍', '卷入机器', '颅内出血', '子宫肌瘤',
-            '未有收入', '脑垂体瘤', '病了', '再生性贫血障碍', '摔了', '生活无法自理',
-            '失去稳定工作', '没能工作', '旧病复发', '摔到'
-        ]
-        for _word in suggest_word:
-            suggest_freq(tuple(_word), True)
-        suggest_split = [
-            ('癫痫', '病'), ('卧床', '不起'), ('黑色素', '瘤'), ('单亲', '家庭'), ('恶性', '肿瘤'),
-            ('断', '腿'), ('断', '手'), ('家', '父'), ('家', '母')
-        ]
-        for _split in suggest_split:
-            suggest_freq(_split, True)
-
-        # 对每个字符串进行分词，并且找寻其中关键字，记录关键字的词性和位置
-        arr = zeros(shape=(len(s), 11))
-        df = pd.DataFrame(arr, columns=[
-            "祖父母患病", "父母离异", "父亲（母亲）患普通疾病", "父母患普通疾病", "父亲（母亲）无业", "父母均无业", "兄弟姐妹患重疾",
-            "父亲（母亲）患重疾", "父母患重疾", "父亲（母亲）去世", "突发重大自然灾害"
-        ])
-        index = s.str.contains(
-            "灾|病虫害|霜冻|地震|台风|洪水|大水|大旱|干旱|冰雹|暴风雨|暴雨|下雪|雷劈|自然状况|" +
-            "禽流感|高温|减产|倒伏|淹|涝|庄稼大量死亡|自然状况|自然天气状况|减产|泥石流|猪瘟|庄稼无收")
-        adjusted_index = 0  # 由于index中少了一些索引，无法直接匹配到df中，需要调整index
-        for i in index:
-            if i:
-                df.loc[adjusted_index, "突发重大自然灾害"] = 1
-            adjusted_index += 1
-
-        row = -1  # 记录str在s中的位置
-
-        for _str in s:
-            row += 1
-            seg_list = cut(_str, cut_all=False)  # 对每个字符串进行分词
-            output = list(seg_list)
-            cut_type = []  # 记录某个关键字的词性
-            cut_loc = []  # 记录某个关键字在str中的位置
-            loc = 0  # loc为某个词在原字符串中的位置(1~len)
-
-            for _cut in output:  # cut为分词结果中的每个词
-                loc += 1
-                if _cut in dad:
-                    cut_type.append("dad")
-                    cut_loc.append(loc - 1)  # cut在原字符串中的索引值(0~len-1)
-
-                elif _cut in mom:
-                    cut_type.append("mom")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in grand_parents:
-                    cut_type.append("grand_parents")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in sp_grand_parents:
-                    cut_type.append("sp_grand_parents")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in siblings:
-                    cut_type.append("siblings")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in sp_siblings:
-                    cut_type.append("sp_siblings")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in invalid_member:
-                    cut_type.append("invalid_member")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in divorce:
-                    cut_type.append("divorce")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in unemployed:
-                    cut_type.append("unemployed")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in dead:
-                    cut_type.append("dead")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in illness:
-                    cut_type.append("illness")
-                    cut_loc.append(loc - 1)
-
-                elif _cut in serious_illness:
-                    cut_type.append("serious_illness")
-                    cut_loc.append(loc - 1)
-
-            serial = 0
-            cut_type.append(" ")
-            cut_type.append(" ")  # 确保检测到最后一位也能检测其后两位的元素的词性
-            cut_loc.append(" ")
-            cut_loc.append(" ")
-
-            while serial < len(cut_type) - 2:
-                flag_dad = False
-                flag_mom = False
-                flag_parents = False  # 判断是父或母还是父与母
-                flag_grand_parents = False
-                flag_sp_grand_parents = False
-                flag_siblings = False
-                flag_sp_siblings = False
-                flag_divorce = False
-                flag_unemployed = False
-                flag_dead = False
-                flag_illness = False
-                flag_serious_illness = False  # 用来检测每组中是否出现相应的关键词，若有则按照规则赋予相应的类1
-
-                current_group = []
-                current_loc = []
-
-                # 每一个pattern起始的词只能为家庭成员
-                if (cut_type[serial] in [
-                    "dad", "mom", "grand_parents", "sp_grand_parents",
-                    "siblings", "sp_siblings", "invalid_member"
-                ]):
-                    current_group.append(cut_type[serial])
-                    current_loc.append(cut_loc[serial])  # 用来判断父母是否连着
-
-                    for forward in range(serial + 1, len(cut_type) - 1):  # 开始检测该pattern内后面的词
-                        current_group.append(cut_type[forward])
-                        current_loc.append(cut_loc[forward])
-                        if ((cut_type[forward] in [" ", "divorce", "unemployed", "dead", "illness",
-                                                   "serious_illness"]) and (
-                                cut_type[forward + 1] in [" ", "dad", "mom", "grand_parents", "sp_grand_parents",
-                                                          "siblings", "sp_siblings", "invalid_member"])):
-                            serial = forward + 1  # 找到行为 -> 人，这一组完成，定位至下一组首个词
-                            break
-
-                    # 此时一组已经检测完成，对其进行匹配
-                    group_serial = 0
-                    current_group.append(" ")
-                    current_group.append(" ")  # 确保检测到最后一位也能检测其后两位的元素
-                    current_loc.append(" ")
-                    current_loc.append(" ")
-                    current_loc.append(" ")
-                    current_loc.append(" ")
-
-                    while group_serial < len(current_group) - 2:
-                        # 一个或多个家庭成员 -> 一件或多件事情 -> 非事情
-                        if (current_group[group_serial] in ["dad", "mom", "grand_parents", "sp_grand_parents",
-                                                            "siblings", "sp_siblings", "invalid_member", "divorce",
-                                                            "unemployed", "dead", "illness", "serious_illness"]):
-                            if (current_group[group_serial + 1] not in [" ", "dad", "mom", "grand_parents",
-                                                                        "sp_grand_parents", "siblings",
-                                                                        "sp_siblings", "invalid_member", "divorce",
-                                                                        "unemployed", "dead", "illness",
-                                                                        "serious_illness"]):
-                                break
-
-                            if current_group[group_serial] == "dad":
-                                flag_dad = True
-                                if ((current_group[group_serial + 1] == "mom") and (
-                                        current_loc[group_serial + 1] == current_loc[group_serial] + 1)):
-                                    flag_parents = True
-
-                            elif current_group[group_serial] == "mom":
-                                flag_mom = True
-                                if ((current_group[group_serial + 1] == "dad") and (
-                                        current_loc[group_serial + 1] == current_loc[group_serial] + 1)):
-                                    flag_parents = True
-
-                            elif current_group[group_serial] == "grand_parents":
-                                flag_grand_parents = True
-
-                            elif current_group[group_serial] == "sp_grand_parents":
-                                flag_sp_grand_parents = True
-
-                            elif current_group[group_serial] == "siblings":
-                                flag_siblings = True
-
-                            elif current_group[group_serial] == "sp_siblings":
-                                flag_sp_siblings = True
-
-                            elif current_group[group_serial] == "divorce":
-                                flag_divorce = True
-
-                            elif current_group[group_serial] == "unemployed":
-                                flag_unemployed = True
-
-                            elif current_group[group_serial] == "dead":
-                                flag_dead = True
-
-                            elif current_group[group_serial] == "illness":
-                                flag_illness = True
-
-                            elif current_group[group_serial] == "serious_illness":
-                                flag_serious_illness = True
-
-                            # 一个pattern中的词已经全部找到，对该pattern进行考察
-                            if ((flag_grand_parents or flag_sp_grand_parents) and (
-                                    flag_illness or flag_serious_illness)):
-                                df.loc[row, "祖父母患病"] = 1
-
-                            if flag_divorce:
-                                df.loc[row, "父母离异"] = 1
-
-                            if flag_illness and (flag_dad or flag_mom) and not flag_parents:
-                                df.loc[row, "父亲（母亲）患普通疾病"] = 1
-
-                            if flag_illness and flag_dad and flag_mom and flag_parents:
-                                df.loc[row, "父母患普通疾病"] = 1
-
-                            if flag_unemployed and (flag_dad or flag_mom) and not flag_parents:
-                                df.loc[row, "父亲（母亲）无业"] = 1
-
-                            if flag_unemployed and flag_dad and flag_mom and flag_parents:
-                                df.loc[row, "父母均无业"] = 1
-
-                            if flag_serious_illness and (flag_siblings or flag_sp_siblings):
-                                df.loc[row, "兄弟姐妹患重疾"] = 1
-
-                            if flag_serious_illness and (flag_dad or flag_mom) and not flag_parents:
-                                df.loc[row, "父亲（母亲）患重疾"] = 1
-
-                            if flag_serious_illness and flag_dad and flag_mom and flag_parents:
-                                df.loc[row, "父母患重疾"] = 1
-
-                            if flag_dead and (flag_dad or flag_mom) and not flag_parents:
-                                df.loc[row, "父亲（母亲）去世"] = 1
-
-                        group_serial += 1
-
-                else:  # 该词不为个数或家庭成员，则访问下一个
-                    serial += 1
-        return df
+        def func(values):
+            res = np.zeros((len(values), len(_ACC_COLUMNS)), dtype='uint8')
+            rows = [i for i, x in enumerate(values) if x not in ACCIDENT_ZERO]
+            ids, offsets = segment([values[i] for i in rows], _ACC_IDS, tokenizer, n_jobs, chunksize)
+            ids, offsets = ids.tolist(), offsets.tolist()
+            for k, i in enumerate(rows):
+                _accident_flags(ids[offsets[k]:offsets[k + 1]], res[i])
+            return res
+
+        arr = _broadcast(s, func, '无', 'uint8', batch=True)
+        arr[:, -1] = _DISASTER_MATCHER.masks(s) != 0
+        return pd.DataFrame(arr, index=s.index, columns=_ACC_COLUMNS)
 
     @staticmethod
     def do_scholarship(s: pd.Series) -> pd.DataFrame:
@@ -869,38 +916,8 @@ class DataSet:
         获得的国家助学金类型（分类变量，0为未获得，1为国家二等助学金，2为国家一等助学金）
 
         """
-        d = pd.DataFrame()
-        d['在校受奖励资助情况'] = s.fillna('无')
-        scholar_map = {
-            '慧明': 5000, '欧莱雅': 5000, '喜来健': 5000, '中海油': 5000,
-            '承锋': 5000, '清茗雅轩': 3000, '盛帆': 3000, '福慧': 2000,
-            '柏年': 2000, '圣恩纳': 2000, '香港好友': 2000, '国泰': 5000,
-            '思源': 4000, '宋声扬': 5000, '长城': 3000, '交通': 2500,
-            '冯顾丽华': 2000, '电装': 3000, '圆梦启航': 6600
-        }
-
-        def func(x):
-            cnt = 0
-            tot = 0
-            is_national = 0
-            for k, v in scholar_map.items():
-                if k in x:
-                    cnt += 1
-                    tot += v
-            if '国家' in x or '国助' in x:
-                cnt += 1
-                if "一" in x:
-                    is_national = 2
-                    tot += 3800
-                else:
-                    is_national = 1
-                    tot += 2800
-            return cnt, tot, is_national
-
-        d['tmp'] = d['在校受奖励资助情况'].apply(func)
-        d[['助学金个数', '助学金金额', '国助类型']] = d['tmp'].apply(pd.Series)
-        d.drop(['在校受奖励资助情况', 'tmp'], axis=1, inplace=True)
-        return d
+        cnt, tot, national = scholarship_arrays(s)
+        return pd.DataFrame({'助学金个数': cnt, '助学金金额': tot, '国助类型': national}, index=s.index)
 
     @staticmethod
     def do_resident_type(s: pd.Series) -> pd.Series:
@@ -913,8 +930,7 @@ class DataSet:
         Returns:返回pandas.Series
 
         """
-        d = s.fillna('城镇')
-        return d.apply(lambda x: ('非' in x) ^ ('农' in x))
+        return pd.Series(_broadcast(s, lambda x: ('非' in x) ^ ('农' in x), '城镇', bool), index=s.index, name=s.name)
 
     @staticmethod
     def do_household(s: pd.Series) -> pd.Series:
@@ -927,7 +943,6 @@ class DataSet:
         Returns:返回pandas.Series
 
         """
-        d = s.fillna(3)
         to_be_replace = {
             '一': '1', '二': '2', '三': '3', '四': '4', '五': '5', '六': '6',
             '七': '7', '八': '8', '九': '9', '人': '', '口': ''
@@ -939,7 +954,7 @@ class DataSet:
                     x = x.replace(k, v)
             return int(x)
 
-        return d.apply(func)
+        return pd.Series(_broadcast(s, func, 3, 'int64'), index=s.index, name=s.name)
 
     @staticmethod
     def do_loan(s: pd.Series):
@@ -953,7 +968,6 @@ class DataSet:
         Returns:返回pandas.Series
 
         """
-        res = s.fillna('-')
         yes_list = ['是', '√', '19500', '32000', '助学', '生源地', '校园', '扶贫', '学', '有', '贷款']
         no_list = ['否', '无', '未', '-', '房', '50000', '10万', '借', '商业', '家', '父亲']
 
@@ -968,7 +982,7 @@ class DataSet:
                     return False
             return loan
 
-        return res.apply(fun)
+        return pd.Series(_broadcast(s, fun, '-', bool), index=s.index, name=s.name)
 
     @staticmethod
     def do_ethnic_group(s: pd.Series) -> pd.Series:
@@ -981,37 +995,66 @@ class DataSet:
         Returns:返回pandas.Series
 
         """
-        d = s.fillna('汉')
-        return d.apply(lambda x: False if '汉' in x else True)
+        return pd.Series(_broadcast(s, lambda x: '汉' not in x, '汉', bool), index=s.index, name=s.name)
 
-    def generate_feature(self):
+    def generate_feature(self, tokenizer: CachedTokenizer = None, n_jobs: int = 1, chunksize: int = 20000,
+                         profile: bool = False, columns=None):
         """
         按顺序将原始特征转为可使用的特征，并将特征重命名为f1,f2,f3....
-        Returns:处理好的DataSet对象，特征名映射在features_name属性中
+        n_jobs不为1且数据多于chunksize行时，各个特征提取函数的输入先去重，不同的取值按chunksize分块后交给进程池并行执行，
+        结果按原顺序映射回每一行，与串行的结果完全相同。
+        指定columns时只运行产生这些特征的特征提取函数，例如模型不用受教育情况和突发事件时完全不需要分词；
+        特征的编号与生成全部特征时相同
+
+        Args:
+            tokenizer: do_education和do_accident使用的分词器，不填则使用共用的带缓存分词器，
+                需要磁盘缓存时传入CachedTokenizer(cache_path=...)，每次生成完都会sync。并行时各进程按它的设置分词，结果写回它的缓存
+            n_jobs: 进程数，1为串行，-1为使用所有CPU
+            chunksize: 并行时每块的不同取值个数，数据不多于这么多行时直接串行
+            profile: 是否统计各个特征提取函数的耗时、内存等，统计内存会让提取变慢
+            columns: 需要的特征，f*编号或中文特征名的列表，也可以是训练好的模型，见resolve_features；
+                不填则生成全部特征
+
+        Returns: profile为True时返回MLSR.profiling.FeatureReport，否则返回None。
+            处理好的特征在features属性中，特征名映射在features_name属性中
 
         """
-        d = [
-            DataSet.do_nation_policy(self.features[['享受国家政策资助情况', '突发事件情况', '家庭主要经济来源']]),
-            DataSet.do_income(self.features[['家庭主要经济来源', '家庭人均年收入']]),
-            DataSet.do_education(self.features['家庭其他成员在受教育情况']),
-            DataSet.do_accident(self.features['突发事件情况']),
-            DataSet.do_scholarship(self.features['在校受奖励资助情况']),
-            DataSet.do_ethnic_group(self.features['民族']),
-            DataSet.do_household(self.features['家庭人口']),
-            DataSet.do_loan(self.features['是否贷款']),
-            DataSet.do_resident_type(self.features['入学前户口性质'])
-        ]
+        start = time.perf_counter()
+        wanted = FEATURE_NAMES if columns is None else resolve_features(columns)
+        needed = set().union(*[_PRODUCERS[x] for x in wanted])
+        extractors = [(name, cols) for name, cols in _EXTRACTORS if name in needed]
+        if n_jobs == 1 or len(self.features) <= chunksize:
+            # 数据只有一块时进程池只会更慢
+            tokenizer = _prepare_tokenizer(tokenizer) if needed & _TOKENIZED else tokenizer
+            res = [_run_extractor(name, self.features[cols], tokenizer, profile) for name, cols in extractors]
+            d = [r[0] for r in res] if profile else res
+            stats = [[r[1]] for r in res] if profile else None
+        else:
+            d, stats = _parallel_extract(self.features, n_jobs, chunksize, profile, extractors, tokenizer)
+        if tokenizer is not None and needed & _TOKENIZED:
+            # 每批数据处理完就把新的分词结果写到磁盘上
+            tokenizer.sync()
+        report = None
+        if profile:
+            report = FeatureReport(len(self.features), n_jobs)
+            for (name, cols), st in zip(extractors, stats):
+                report.add(name, _distinct(self.features[cols]), st)
         new_f = pd.concat(d, axis=1, copy=False)
-        new_f['父母均下岗'] |= new_f['父母均无业']
-        new_f['父母一方下岗'] |= new_f['父亲（母亲）无业']
-        new_f.drop(['父母均无业', '父亲（母亲）无业'], axis=1, inplace=True)
+        # 突发事件中的父母无业并入家庭主要经济来源中的下岗
+        for to, frm in _MERGED_FEATURES.items():
+            if to in new_f.columns and frm in new_f.columns:
+                new_f[to] |= new_f[frm].astype(bool)
+        order = [x for x in FEATURE_NAMES if x in wanted]
+        new_f = new_f[order].astype({x: FEATURE_DTYPES[x] for x in order})
         self.features = new_f
-        self.features_name = {'f' + str(i): x for i, x in enumerate(self.features.columns)}
+        self.features_name = {'f' + str(FEATURE_NAMES.index(x)): x for x in order}
         self.features.columns = self.features_name.keys()
-        return
+        if profile:
+            report.total_seconds = time.perf_counter() - start
+        return report
 
     @staticmethod
-    def data_augment(n: int = 1000, filename: str = None):
+    def data_augment(n: int = 1000, filename: str = None, seed=None):
         """数据增强
         一般数据集中没有非经济困难的，但是这样的模型并不够鲁棒，
         所以我们需要按照一定规则生成非困难的样本，增强数据
@@ -1020,51 +1063,296 @@ class DataSet:
         Args:
             n: 生成的数据条数
             filename: 生成数据的保存路径
+            seed: 随机数种子，也可以传入numpy.random.Generator，不填则每次结果不同
 
         Returns: DataSet对象
 
         """
-        d = DataSet()
-        d.features_name = {
-            'f0': '建档立卡贫困户', 'f1': '城乡低保户', 'f2': '五保户', 'f3': '孤残学生',
-            'f4': '军烈属或优抚子女', 'f5': '经商', 'f6': '务农', 'f7': '退休',
-            'f8': '低保', 'f9': '打工', 'f10': '父母均下岗', 'f11': '父母一方下岗',
-            'f12': '家庭人均年收入', 'f13': '大学', 'f14': '高中', 'f15': '义务教育',
-            'f16': '祖父母患病', 'f17': '父母离异', 'f18': '父亲（母亲）患普通疾病',
-            'f19': '父母患普通疾病', 'f20': '兄弟姐妹患重疾', 'f21': '父亲（母亲）患重疾',
-            'f22': '父母患重疾', 'f23': '父亲（母亲）去世', 'f24': '突发重大自然灾害',
-            'f25': '助学金个数', 'f26': '助学金金额', 'f27': '国助类型', 'f28': '民族',
-            'f29': '家庭人口', 'f30': '是否贷款', 'f31': '入学前户口性质'
-        }
-        d.label = pd.Series([2] * n)
-        d.strong_label = pd.Series([-1] * n)
-        f = pd.DataFrame()
-        for i in ['f0', 'f1', 'f2', 'f3', 'f8', 'f25', 'f26', 'f27', 'f30']:
-            f[i] = pd.Series(zeros(n, dtype='int32'))
-        f['f4'] = pd.Series(random.binomial(1, 0.002, n))
-        f['f10'] = pd.Series(random.binomial(1, 0.002, n))
-        f['f11'] = pd.Series(random.binomial(1, 0.02, n))
-        f['f12'] = pd.Series(random.lognormal(10.1811, 0.1892, n))
-        f['f13'] = pd.Series(random.binomial(3, 0.01, n))
-        f['f14'] = pd.Series(random.binomial(3, 0.01, n))
-        f['f15'] = pd.Series(random.binomial(3, 0.035, n))
-        f['f16'] = pd.Series(random.binomial(1, 0.15, n))
-        f['f17'] = pd.Series(random.binomial(1, 0.01, n))
-        f['f18'] = pd.Series(random.binomial(1, 0.01, n))
-        f['f19'] = pd.Series(random.binomial(1, 0.05, n))
-        f['f20'] = pd.Series(random.binomial(1, 0.003, n))
-        f['f21'] = pd.Series(random.binomial(1, 0.008, n))
-        f['f22'] = pd.Series(random.binomial(1, 0.00036, n))
-        f['f23'] = pd.Series(random.binomial(1, 0.008, n))
-        f['f24'] = pd.Series(random.binomial(1, 0.01, n))
-        f['f28'] = pd.Series(random.binomial(1, 0.05, n))
-        f['f29'] = pd.Series(random.binomial(7, 0.4, n))
-        f['f31'] = pd.Series(random.binomial(1, 0.1, n))
-        f['source'] = f['f31'].apply(lambda x: random.random_integers(1, 15 if x else 7))
-        f['f5'] = f['source'].apply(lambda x: x & 1)
-        f['f7'] = f['source'].apply(lambda x: (x >> 1) & 1)
-        f['f9'] = f['source'].apply(lambda x: (x >> 2) & 1)
-        f['f6'] = f['source'].apply(lambda x: (x >> 3) & 1)
-        f.drop('source', axis=1, inplace=True)
-        d.features = f
-        return d
+        return _augment_batch(np.random.default_rng(seed), n)
+
+    @staticmethod
+    def iter_augment(n: int, batch_size: int = 100000, seed=None):
+        """
+        分批生成增强数据，内存占用只与batch_size有关，用于生成大量数据做压力测试
+
+        Args:
+            n: 生成的数据总条数
+            batch_size: 每批的条数
+            seed: 随机数种子，也可以传入numpy.random.Generator，种子相同时生成的数据相同
+
+        Returns: 生成器，依次产生每批的DataSet
+
+        """
+        rng = np.random.default_rng(seed)
+        for start in range(0, n, batch_size):
+            yield _augment_batch(rng, min(batch_size, n - start))
+
+
+# generate_feature中各个特征提取函数及其输入列，顺序就是输出特征的顺序
+_EXTRACTORS = [
+    ('do_nation_policy', ['享受国家政策资助情况', '突发事件情况', '家庭主要经济来源']),
+    ('do_income', ['家庭主要经济来源', '家庭人均年收入']),
+    ('do_education', '家庭其他成员在受教育情况'),
+    ('do_accident', '突发事件情况'),
+    ('do_scholarship', '在校受奖励资助情况'),
+    ('do_ethnic_group', '民族'),
+    ('do_household', '家庭人口'),
+    ('do_loan', '是否贷款'),
+    ('do_resident_type', '入学前户口性质')
+]
+# 需要分词的特征提取函数
+_TOKENIZED = {'do_education', 'do_accident'}
+# 各个特征提取函数输出的特征，顺序与_EXTRACTORS相同
+_OUTPUTS = {
+    'do_nation_policy': list(POLICY_KEYWORDS),
+    'do_income': _INCOME_MATCHER.names + ['家庭人均年收入'],
+    'do_education': ['大学', '高中', '义务教育'],
+    'do_accident': _ACC_COLUMNS,
+    'do_scholarship': ['助学金个数', '助学金金额', '国助类型'],
+    'do_ethnic_group': ['民族'],
+    'do_household': ['家庭人口'],
+    'do_loan': ['是否贷款'],
+    'do_resident_type': ['入学前户口性质']
+}
+# 由另一个特征合并进来的特征：{最终特征: 被合并的中间特征}
+_MERGED_FEATURES = {'父母均下岗': '父母均无业', '父母一方下岗': '父亲（母亲）无业'}
+# 全部特征，按f0~f31的顺序
+FEATURE_NAMES = list(FEATURE_DTYPES)
+# convert_to_ssl由弱标签加入的特征，不由特征提取函数生成
+SSL_FEATURE = '院系认定贫困类型'
+# 每个特征需要运行的特征提取函数
+_PRODUCERS = {}
+for _name, _outputs in _OUTPUTS.items():
+    for _x in _outputs:
+        _PRODUCERS.setdefault(_x, set()).add(_name)
+for _to, _frm in _MERGED_FEATURES.items():
+    _PRODUCERS[_to] |= _PRODUCERS[_frm]
+
+
+def resolve_features(columns) -> set:
+    """
+    把需要的特征统一转为中文特征名
+
+    Args:
+        columns: f*编号或中文特征名的列表，或者训练好的模型：primary和ssl中训练的模型带有training_features_属性，
+            用DataFrame训练的scikit-learn模型带有feature_names_in_属性；都没有时模型的n_features_in_须等于全部特征数
+
+    Returns: 中文特征名的set
+
+    """
+    if hasattr(columns, 'fit'):
+        model = columns
+        columns = getattr(model, 'training_features_', None)
+        if columns is None:
+            columns = getattr(model, 'feature_names_in_', None)
+        if columns is None:
+            n = getattr(model, 'n_features_in_', None)
+            if n != len(FEATURE_NAMES):
+                raise ValueError('cannot tell which features {} was trained on: it has no training_features_ or '
+                                 'feature_names_in_, and n_features_in_={} is not all {} features'
+                                 .format(type(model).__name__, n, len(FEATURE_NAMES)))
+            columns = FEATURE_NAMES
+    elif isinstance(columns, str) or not hasattr(columns, '__iter__'):
+        raise TypeError('columns must be a list of features or a trained model, got {!r}'.format(columns))
+    wanted = set()
+    for x in columns:
+        x = str(x)
+        if x in FEATURE_DTYPES:
+            wanted.add(x)
+        elif x[:1] == 'f' and x[1:].isdigit() and int(x[1:]) < len(FEATURE_NAMES):
+            wanted.add(FEATURE_NAMES[int(x[1:])])
+        elif x != SSL_FEATURE:
+            raise ValueError('unknown feature: {}'.format(x))
+    return wanted
+
+
+# 原始数据中需要读入的列：各个特征提取函数的输入列和标签列
+RAW_COLUMNS = {'院系认定贫困类型', '专家判定等级'}
+for _, _cols in _EXTRACTORS:
+    RAW_COLUMNS.update([_cols] if isinstance(_cols, str) else _cols)
+
+
+# data_augment中各个特征的分布：(特征名, 二项分布的试验次数, 概率)，f12收入为对数正态分布；
+# 列的顺序与原来的实现保持一致
+_AUGMENT_ZEROS = ['f0', 'f1', 'f2', 'f3', 'f8', 'f25', 'f26', 'f27', 'f30']
+_AUGMENT_BINOMIAL = [
+    ('f4', 1, 0.002), ('f10', 1, 0.002), ('f11', 1, 0.02), ('f12', None, None),
+    ('f13', 3, 0.01), ('f14', 3, 0.01), ('f15', 3, 0.035), ('f16', 1, 0.15),
+    ('f17', 1, 0.01), ('f18', 1, 0.01), ('f19', 1, 0.05), ('f20', 1, 0.003),
+    ('f21', 1, 0.008), ('f22', 1, 0.00036), ('f23', 1, 0.008), ('f24', 1, 0.01),
+    ('f28', 1, 0.05), ('f29', 7, 0.4), ('f31', 1, 0.1)
+]
+# 家庭主要经济来源按二进制位拆开：第0位经商，第1位退休，第2位打工，第3位务农
+_AUGMENT_SOURCE_BITS = [('f5', 0), ('f7', 1), ('f9', 2), ('f6', 3)]
+# FEATURE_DTYPES按f0~f31的顺序排列
+_AUGMENT_NAMES = {'f' + str(i): name for i, name in enumerate(FEATURE_DTYPES)}
+
+
+def _augment_batch(rng: np.random.Generator, n: int) -> DataSet:
+    """
+    生成一批增强数据
+
+    Args:
+        rng: 随机数生成器
+        n: 条数
+
+    Returns: DataSet对象
+
+    """
+    d = DataSet()
+    d.features_name = dict(_AUGMENT_NAMES)
+    d.label = pd.Series(np.full(n, 2, dtype='int64'))
+    d.strong_label = pd.Series(np.full(n, -1, dtype='int64'))
+    f = {c: np.zeros(n, dtype=FEATURE_DTYPES[_AUGMENT_NAMES[c]]) for c in _AUGMENT_ZEROS}
+    for c, trials, p in _AUGMENT_BINOMIAL:
+        if trials is None:
+            v = rng.lognormal(10.1811, 0.1892, n)
+        else:
+            v = rng.binomial(trials, p, n)
+        f[c] = v.astype(FEATURE_DTYPES[_AUGMENT_NAMES[c]])
+    # f31为1时经济来源在1~15中取，否则在1~7中取（不含务农）
+    source = rng.integers(1, np.where(f['f31'], 16, 8))
+    for c, bit in _AUGMENT_SOURCE_BITS:
+        f[c] = ((source >> bit) & 1).astype(FEATURE_DTYPES[_AUGMENT_NAMES[c]])
+    d.features = pd.DataFrame(f)
+    return d
+
+
+def _prepare_tokenizer(tokenizer: CachedTokenizer = None) -> CachedTokenizer:
+    """
+    分词之前先加载好词典
+
+    Args:
+        tokenizer: 分词器，不填则使用共用的分词器
+
+    Returns: 加载好的分词器
+
+    """
+    if tokenizer is None:
+        tokenizer = default_tokenizer()
+    return tokenizer.load()
+
+
+def _run_extractor(name: str, data, tokenizer: CachedTokenizer = None, profile: bool = False,
+                   n_jobs: int = 1, chunksize: int = 20000):
+    """
+    按名字调用一个特征提取函数
+
+    Args:
+        name: DataSet中do_*函数的名字
+        data: 该函数的输入列
+        tokenizer: 分词器，只传给需要分词的函数
+        profile: 是否统计运行情况
+        n_jobs: 分词的进程数，只传给需要分词的函数
+        chunksize: 并行分词时每块的字符串个数
+
+    Returns: 该函数的输出；profile为True时返回(输出, 统计)，见MLSR.profiling.measure
+
+    """
+    func = getattr(DataSet, name)
+    if name in _TOKENIZED:
+        if tokenizer is None:
+            tokenizer = _prepare_tokenizer()
+        args = (data, tokenizer, n_jobs, chunksize)
+    else:
+        tokenizer = None
+        args = (data,)
+    if profile:
+        return measure(func, *args, tokenizer=tokenizer)
+    return func(*args)
+
+
+def _distinct(data) -> int:
+    """
+    输入的不同取值个数，多列时为不同的行数
+    """
+    if isinstance(data, pd.Series):
+        return data.nunique(dropna=False)
+    return len(data.drop_duplicates())
+
+
+def _rows(data, start: int, stop: int):
+    """
+    按行切出一块交给进程池。category列只保留这块中出现的类别，
+    否则每块都会带上整列的类别表，各进程要把整列所有不同的取值都处理一遍
+
+    Args:
+        data: 输入列，Series或DataFrame
+        start: 起始行
+        stop: 结束行
+
+    Returns: 与data类型相同的一块
+    """
+    part = data.iloc[start:stop]
+    if isinstance(part, pd.Series):
+        return part.cat.remove_unused_categories() if isinstance(part.dtype, pd.CategoricalDtype) else part
+    cats = {c: part[c].cat.remove_unused_categories()
+            for c in part.columns if isinstance(part[c].dtype, pd.CategoricalDtype)}
+    return part.assign(**cats) if cats else part
+
+
+def _distinct_values(s: pd.Series) -> tuple:
+    """
+    一列中不同的取值，以及每一行对应第几个不同取值
+
+    Args:
+        s: 输入列
+
+    Returns: (按第一次出现的顺序排列的不同取值Series, 每一行的编码numpy.ndarray)
+
+    """
+    codes = s.to_frame().groupby(s.name, dropna=False, sort=False, observed=True).ngroup().to_numpy()
+    first = np.unique(codes, return_index=True)[1]
+    return s.iloc[first], codes
+
+
+def _parallel_extract(features: pd.DataFrame, n_jobs: int, chunksize: int, profile: bool = False,
+                      extractors: list = None, tokenizer: CachedTokenizer = None) -> tuple:
+    """
+    单列输入的特征提取函数（逐个取值处理的）先去重，不同的取值按chunksize分块交给进程池；
+    需要分词的函数在当前进程中对去重后的取值运行，分词由MLSR.tokenizer.segment用tokenizer的设置交给同一个进程池，
+    结果写回tokenizer的缓存；多列输入的函数按列向量化匹配，各列不同的取值组合很多，去重和传给进程都不划算，
+    整列在当前进程中与进程池同时运行。
+    进程池用joblib的可复用进程池，多次调用（如iter_chunks的各块）共用同一批进程
+
+    Args:
+        features: 原始特征
+        n_jobs: 进程数，-1为使用所有CPU
+        chunksize: 每块的不同取值个数
+        profile: 是否统计各块的运行情况
+        extractors: 要运行的(函数名, 输入列)，不填则为_EXTRACTORS
+        tokenizer: 需要分词的函数使用的分词器，不填则使用共用的分词器
+
+    Returns: (与extractors顺序相同的各函数输出, 各函数各块的统计)，profile为False时统计为None
+
+    """
+    extractors = _EXTRACTORS if extractors is None else extractors
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count()
+    if any(name in _TOKENIZED for name, _ in extractors):
+        tokenizer = _prepare_tokenizer(tokenizer)
+    pool = get_reusable_executor(max_workers=n_jobs)
+    codes, uniques, futures = {}, {}, {}
+    for k, (name, cols) in enumerate(extractors):
+        if isinstance(cols, str):
+            uniques[k], codes[k] = _distinct_values(features[cols])
+            if name not in _TOKENIZED:
+                futures[k] = [pool.submit(_run_extractor, name, _rows(uniques[k], i, i + chunksize), None, profile)
+                              for i in range(0, max(len(uniques[k]), 1), chunksize)]
+    local = {}
+    for k, (name, cols) in enumerate(extractors):
+        if k not in futures:
+            data = uniques[k] if k in uniques else features[cols]
+            local[k] = [_run_extractor(name, data, tokenizer, profile, n_jobs, chunksize)]
+    parts = [[f.result() for f in futures[k]] if k in futures else local[k] for k in range(len(extractors))]
+    stats = None
+    if profile:
+        stats = [[p[1] for p in ps] for ps in parts]
+        parts = [[p[0] for p in ps] for ps in parts]
+    res = [pd.concat(ps) for ps in parts]
+    for k, c in codes.items():
+        # 不同取值的结果映射回每一行
+        res[k] = res[k].iloc[c]
+    for r in res:
+        r.index = features.index
+    return res, stats
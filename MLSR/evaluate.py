@@ -0,0 +1,161 @@
+import json
+import time
+import numpy as np
+from sklearn.metrics import f1_score, accuracy_score
+from sklearn.metrics import confusion_matrix
+from joblib import dump
+from time import strftime, localtime
+
+
+def evaluate(model, splits: dict) -> dict:
+    """
+    在各个数据集上评估模型，每个数据集只预测一次，所有指标和混淆矩阵都由这一次的预测结果计算
+
+    Args:
+        model: 训练好的模型
+        splits: {名称: (特征, 标签)}，如{'train': (Xtrain, ytrain), 'test': (Xtest, ytest)}
+
+    Returns: {名称: {'rows', 'predict_seconds', 'accuracy', 'f1_macro', 'labels', 'confusion_matrix'}}
+
+    """
+    result = {}
+    for name, (X, y) in splits.items():
+        start = time.perf_counter()
+        prediction = model.predict(X)
+        seconds = time.perf_counter() - start
+        labels = np.unique(np.concatenate((np.asarray(y), prediction)))
+        result[name] = {
+            'rows': len(y),
+            'predict_seconds': seconds,
+            'accuracy': accuracy_score(y, prediction),
+            'f1_macro': f1_score(y, prediction, average='macro'),
+            'labels': labels,
+            'confusion_matrix': confusion_matrix(y, prediction, labels=labels)
+        }
+    return result
+
+
+def _scorer_name(search) -> str:
+    """
+    搜索用来选择最佳模型的评分指标的名字
+
+    Args:
+        search: 搜索模型
+
+    Returns: str，如'f1_macro'；自定义的评分函数为其函数名
+
+    """
+    scoring, refit = search.scoring, search.refit
+    if isinstance(scoring, dict):
+        scoring = scoring[refit]
+    elif isinstance(scoring, (list, tuple)):
+        scoring = refit
+    if scoring is None:
+        return 'score'
+    if isinstance(scoring, str):
+        return scoring
+    return getattr(getattr(scoring, '_score_func', scoring), '__name__', str(scoring))
+
+
+def search_summary(search) -> dict:
+    """
+    搜索结果的摘要：最佳参数、所用的评分指标、交叉验证最佳得分，以及每个候选的参数、各指标的平均得分、标准差和排名；
+    网格经过expand_grid展开时还有展开前后的候选个数，逐次减半和淘汰搜索还有每轮的候选个数
+
+    Args:
+        search: 训练好的搜索模型
+
+    Returns: dict
+
+    """
+    cv_results = search.cv_results_
+    keys = [k for k in cv_results
+            if k.startswith(('mean_test_', 'std_test_', 'rank_test_')) or k in ('mean_fit_time', 'iter', 'n_resources')]
+    summary = {
+        'best_params': search.best_params_,
+        'scoring': _scorer_name(search),
+        'best_cv_score': search.best_score_,
+        'cv_results': dict({'params': cv_results['params']}, **{k: cv_results[k] for k in keys})
+    }
+    if getattr(search, 'expanded_from_', None) is not None:
+        candidates = len(search.param_grid)
+        summary['grid_expansion'] = {
+            'expanded_from': search.expanded_from_,
+            'candidates': candidates,
+            'fits_saved': (search.expanded_from_ - candidates) * search.n_splits_
+        }
+    if hasattr(search, 'racing_history_'):
+        summary['racing'] = search.racing_history_
+    if hasattr(search, 'n_resources_'):
+        summary['halving'] = {'n_candidates': search.n_candidates_, 'n_resources': search.n_resources_}
+    return summary
+
+
+def _to_json(o):
+    # numpy的数组和标量转为python对象，其余（如模型参数中的对象）写成字符串
+    if isinstance(o, (np.ndarray, np.generic)):
+        return o.tolist()
+    return str(o)
+
+
+def write_report(report: dict, path: str):
+    """
+    把评估报告写成json文件
+
+    Args:
+        report: 报告
+        path: 文件路径
+
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=_to_json)
+
+
+def report_search(search, log_dir: str, Xtrain, ytrain, Xtest, ytest, train_classes: list, test_classes: list,
+                  verbose: int = 2) -> dict:
+    """
+    保存训练好的搜索模型并评估：直接使用内存中的最佳模型，训练集和测试集各预测一次，
+    结果写入日期命名的.log.txt（文本摘要）和.report.json（完整报告），verbose不为0时绘制混淆矩阵
+
+    Args:
+        search: 训练好的搜索模型
+        log_dir: 训练结果输出目录
+        Xtrain: 训练集特征
+        ytrain: 训练集标签
+        Xtest: 测试集特征
+        ytest: 测试集标签
+        train_classes: 训练集混淆矩阵的类名
+        test_classes: 测试集混淆矩阵的类名
+        verbose: 日志级别，0时只评估测试集
+
+    Returns: 报告dict
+
+    """
+    from .plot import plot_confusion_matrix
+    dump(search, log_dir + '/gsCV')
+    dump(search.best_estimator_, log_dir + '/best_model')
+    file_prefix = log_dir + '/' + strftime("%Y_%m_%d_%H_%M_%S", localtime())
+    splits = {'train': (Xtrain, ytrain), 'test': (Xtest, ytest)} if verbose else {'test': (Xtest, ytest)}
+    report = search_summary(search)
+    report['splits'] = evaluate(search.best_estimator_, splits)
+    write_report(report, file_prefix + '.report.json')
+    test = report['splits']['test']
+    with open(file_prefix + '.log.txt', 'x') as file:
+        if verbose:
+            file.write(search.get_params().__str__())
+            file.write('\nBest {} on training set by grid search cross validation: {}\n'
+                       .format(report['scoring'], report['best_cv_score']))
+            if 'grid_expansion' in report:
+                file.write('Grid expanded from {expanded_from} to {candidates} candidates, {fits_saved} fits saved\n'
+                           .format(**report['grid_expansion']))
+            for r in report.get('racing', []):
+                file.write('Racing kept {survivors} of {candidates} candidates after {folds} folds\n'.format(**r))
+        file.write('Accuracy on test set: {}\n'.format(test['accuracy']))
+        file.write('F1-score on test set: {}\n'.format(test['f1_macro']))
+        if verbose:
+            for name, classes in [('train', train_classes), ('test', test_classes)]:
+                cm = report['splits'][name]['confusion_matrix']
+                plot_confusion_matrix(cm, classes, file_prefix + '_{}_cm.png'.format(name))
+                file.write('\n{}_cm:\n'.format(name))
+                file.write(cm.__str__())
+    return report
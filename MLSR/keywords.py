@@ -0,0 +1,182 @@
+# 特征提取使用的关键字表
+# 各个do_*函数以及匹配器都从这里读取关键字，修改关键字只需要改这一个文件
+
+# 享受国家政策资助情况
+POLICY_KEYWORDS = {
+    '建档立卡贫困户': ('立卡',),
+    '城乡低保户': ('低保',),
+    '五保户': ('五保',),
+    '孤残学生': ('孤残',),
+    '军烈属或优抚子女': ('军烈属',),
+}
+
+# 突发事件情况中可以认定为孤残学生的关键字
+ORPHAN_KEYWORDS = (
+    '父母双亡', '父母去世', '孤残', '孤儿', '重大疾病、突发意外致残', '本人视力残疾', '本人严重烫伤'
+)
+
+# 在校受奖励资助情况中的社会助学金及其金额，子串匹配
+SCHOLARSHIP_AMOUNTS = {
+    '慧明': 5000, '欧莱雅': 5000, '喜来健': 5000, '中海油': 5000,
+    '承锋': 5000, '清茗雅轩': 3000, '盛帆': 3000, '福慧': 2000,
+    '柏年': 2000, '圣恩纳': 2000, '香港好友': 2000, '国泰': 5000,
+    '思源': 4000, '宋声扬': 5000, '长城': 3000, '交通': 2500,
+    '冯顾丽华': 2000, '电装': 3000, '圆梦启航': 6600
+}
+
+# 家庭主要经济来源，子串匹配
+INCOME_KEYWORDS = {
+    '经商': (
+        '生意', '经营', '从商', '经商', '地摊', '摆摊', '杂货铺', '店', '卖',
+        '买', '个体', '餐', '理发', '手工', '水果摊', '蒸馒头', '股票'
+    ),
+    '务农': (
+        '务农', '农作', '农民', '农收', '农业', '农务', '农村', '农活', '耕', '种植', '种地',
+        '种粮', '庄稼', '田', '农产品', '土地', '葡萄', '果树', '果园', '畜', '玉米', '梨园',
+        '牧', '养殖', '苹果', '枣'
+    ),
+    '退休': ('退休', '养老', '退养', '病休', '内退', '病退', '退职'),
+    '低保': ('低保', '最低生活保障'),
+    '打工': (
+        '打工', '务工', '农民工', '工地', '零工', '临时工', '工人', '临工', '短工', '小工', '散工',
+        '出租车', '货车', '教师', '苦力', '司机', '体力劳动', '保安', '看守', '送货', '公交车', '裁缝',
+        '保姆', '上班', '工活', '教书', '清洁工', '营业员', '城市', '普通职工', '诊所', '超市工作',
+        '跑保险', '打杂', '干活', '杂工', '十字绣', '代教', '职员', '瓷砖', '看门', '建房子', '职工',
+        '房屋出租', '房租', '自由职业', '副业', '父母工资收入', '父母劳动收入', '劳务报酬',
+        '父母的工资', '做工', '劳动收入', '卫生所从医', '工作收入', '不固定', '不稳定',
+        '无稳定', '非固定', '非稳定', '无固定', '没有固定'
+    ),
+    '父母均下岗': (
+        '父母无业', '双方失业', '父母均无业', '父母下岗', '均下岗', '双下岗',
+        '亲友', '接济', '救济', '资助', '勤工俭学', '经济扶持', '补助', '补贴',
+        '寄养家庭', '父母离岗工资', '社保'
+    ),
+    '父母一方下岗': (
+        '一方', '母亲固定收入', '父亲固定收入', '母亲下岗', '父亲下岗',
+        '父亲失业', '母亲失业', '一人工资', '一人的工资', '爸爸工资', '妈妈工资',
+        '爸爸的工资', '妈妈的工资', '父亲的工资', '父亲工资', '母亲的工资',
+        '母亲工资', '父亲工作', '母亲工作', '爸爸工作', '妈妈工作', '父亲上班',
+        '母亲上班', '父亲收入', '母亲收入', '父亲无业'
+    ),
+}
+
+# 家庭主要经济来源，整串精确匹配
+INCOME_EXACT = {
+    '打工': (
+        '城镇', '父母劳作', '家长工资', '父亲、母亲', '父母微薄收入', '工薪', '基本工资',
+        '职工工资', '父母工资', '父母工作收入', '父母', '工作', '父母工作', '父母收入',
+        '工资收入', '工资'
+    ),
+    '父母均下岗': (
+        '未写', '暂无', '无', '兄长', '姐姐的工资', '哥哥工作', '姐姐 哥哥',
+        '姐姐的工资收入', '哥哥工资', '本人及奶奶的低保金', '姐姐工资', '现靠父母过去的工资',
+        '靠姑姑接济', '父亲无固定工作，现停业在家母亲一直无工作'
+    ),
+    '父母一方下岗': (
+        '父母一方下岗', '父亲每月工资', '母亲基本工资', '父亲的薪水', '父亲基本工资',
+        '父亲和兄长收入', '父亲姐姐工资', '母亲单位工资', '父亲上岗', '父亲劳务派遣',
+        '父亲固定工资收入', '父亲个人工资', '父亲微薄工资', '4050公益岗位收入', '父兄工资',
+        '爸爸', '父亲的收入', '父亲的工作', '父亲', '母亲'
+    ),
+}
+
+# jieba分词的词频调整，手动检查了前200个数据，发现一些分词结果有误
+# 注意：suggest_word中的词是按tuple(word)传给suggest_freq的，即强制切成单字
+EDUCATION_SUGGEST_WORD = (
+    '兄弟', '高二', '小学毕业', '初中毕业', '高中毕业', '职高毕业', '大学毕业',
+    '大专毕业', '1人', '1个', '1位', '2人', '2个', '2位', '3人', '3个',
+    '3位', '4人', '西安交通大学', '海南师范大学', '河工大',
+    '中国科学院', '北京航空航天大学', '北京大学', '义务教育阶段'
+)
+EDUCATION_SUGGEST_SPLIT = (
+    ('父', '母'), ('兄', '妹'), ('兄', '妹'), ('姐', '弟'),
+    ('姐', '妹'), ('读', '高二'), ('中医药', '大学'), ('农', '学院')
+)
+ACCIDENT_SUGGEST_WORD = (
+    '严重肾病', '肾病综合征', '失去劳动力', '丧失劳动力', '丧失行动力',
+    '无法劳作', '不能劳作', '失去部分劳动力', '失去部分劳动力', '失去行动能力',
+    '丧失劳动能力', '无法承受过重劳动', '心脑血管疾病', '心脑疾病', '肺腺癌',
+    '脑梗', '不得剧烈运动', '重大疾病', '普通疾病', '一般疾病', '一方无业',
+    '均无业', '股骨头坏死', '干重活', '做重活', '腿脚不便', '无法工作', '工作',
+    '精神性疾病', '精神官能症', '公司破产', '腰椎间盘突出', '腰间盘突出', '腿疾',
+    '无工作', '慢性疾病', '睡眠障碍', '卷入机器', '颅内出血', '子宫肌瘤',
+    '未有收入', '脑垂体瘤', '病了', '再生性贫血障碍', '摔了', '生活无法自理',
+    '失去稳定工作', '没能工作', '旧病复发', '摔到'
+)
+ACCIDENT_SUGGEST_SPLIT = (
+    ('癫痫', '病'), ('卧床', '不起'), ('黑色素', '瘤'), ('单亲', '家庭'), ('恶性', '肿瘤'),
+    ('断', '腿'), ('断', '手'), ('家', '父'), ('家', '母')
+)
+
+# 家庭其他成员在受教育情况中视为没有人在受教育的写法，前者为子串匹配，后者为整串匹配
+EDUCATION_ZERO_CONTAINS = ('暂无', '独生', '无在读', '无在受', '无其他', '无成员', '无高中', '无正在')
+EDUCATION_ZERO_EXACT = ('0', '0人', '0人在读高中或大学')
+
+# 家庭其他成员在受教育情况的关键字，按匹配优先级排列，一个词同时出现在多张表中时取靠前的
+EDUCATION_KEYWORDS = [
+    ('number1', {"一个", "1个", "一人", "1人", "一位", "1位"}),
+    ('number2', {"两个", "2个", "两人", "2人", "二人", "两位", "2位", "二位"}),
+    ('number3', {"三个", "3个", "三人", "3人", "三位", "3位"}),
+    ('number4', {"四个", "4个", "四人", "4人", "四位", "4位"}),
+    ('member', {"哥哥", "姐姐", "弟弟", "妹妹", "侄女", "侄子"}),
+    ('sp_member', {"哥", "兄", "姐", "弟", "妹", "大哥", "二哥", "大弟", "二弟", "三弟", "四弟", "五弟", "小弟", "大姐",
+                   "长姐", "二姐", "三姐", "大妹", "小妹", "二妹", "三妹", "四妹"}),
+    ('invalid_member', {"爸爸", "父亲", "妈妈", "母亲", "爷爷", "奶奶", "外祖父", "外祖母", "姥爷", "姥姥", "伯伯", "婆婆",
+                        "外公", "外婆"}),
+    ('invalid_sp_member', {"爸", "妈", "爷", "奶", "祖父", "祖母", "父", "母"}),
+    ('grad', {"幼儿园毕业", "刚毕业", "小学毕业", "小学未毕业", "初中毕业", "初中未毕业", "高中毕业", "大专毕业", "专科毕业",
+              "大学毕业", "三本毕业", "应届毕业", "大学已毕业", "大学刚毕业", "本科毕业", "研究生毕业", "硕士毕业", "博士毕业"}),
+    ('sp_grad', {"毕业", "未受教育", "未接受教育", "文盲", "无学历", "没上过学", "肄业", "未上学"}),
+    ('college', {"研究生", "读研", "博士", "硕士", "大学", "本科", "专升本", "大学生", "河工大"}),
+    ('sp_college', {"考研", "大专", "学院", "高职", "专科", "职业技术学校"}),
+    ('gr_college', {"大一", "大二", "大三", "大四", "研一", "研二", "研三", "博二", "读博"}),
+    ('high_school', {"高中", "高专", "职高", "职专", "职中", "中专", "中学", "职业高中"}),
+    ('gr_high_school', {"高一", "高二", "高三", "高考"}),
+    ('compulsory', {"初中", "小学"}),
+    ('gr_compulsory', {"初一", "初二", "初三", "初中三年级", "一年级", "二年级", "三年级", "四年级", "五年级", "六年级",
+                       "七年级", "八年级", "九年级", "义务教育阶段"}),
+    ('others', {"幼儿园", "学前班", "学前教育"}),
+]
+
+# 突发事件情况中视为没有发生突发事件的写法，整串匹配
+ACCIDENT_ZERO = ('无', '否', '没有', '正常', '暂无')
+
+# 突发事件情况中的自然灾害，子串匹配
+DISASTER_KEYWORDS = (
+    '灾', '病虫害', '霜冻', '地震', '台风', '洪水', '大水', '大旱', '干旱', '冰雹', '暴风雨', '暴雨', '下雪', '雷劈',
+    '自然状况', '禽流感', '高温', '减产', '倒伏', '淹', '涝', '庄稼大量死亡', '自然天气状况', '泥石流', '猪瘟', '庄稼无收'
+)
+
+# 突发事件情况的关键字，按匹配优先级排列，一个词同时出现在多张表中时取靠前的
+ACCIDENT_KEYWORDS = [
+    ('dad', {"爸爸", "父亲", "爸", "父"}),
+    ('mom', {"妈妈", "母亲", "妈", "母"}),
+    ('grand_parents', {"老人", "长辈", "祖父母", "爷爷", "奶奶", "外祖父", "外祖母", "姥爷", "姥姥", "外公", "外婆"}),
+    ('sp_grand_parents', {"爷", "奶", "祖父", "祖母"}),
+    ('siblings', {"哥哥", "姐姐", "弟弟", "妹妹"}),
+    ('sp_siblings', {"哥", "兄", "姐", "弟", "妹", "大哥", "二哥", "大弟", "二弟", "三弟", "四弟", "五弟", "小弟", "大姐", "长姐", "二姐",
+        "三姐", "大妹", "小妹", "二妹", "三妹", "四妹"}),
+    ('invalid_member', {"我", "本人", "自己", "侄女", "侄子", "伯伯", "伯母", "大伯", "二伯", "三伯", "伯父", "婆婆", "舅舅", "小姑",
+        "姑姑", "二姑", "大舅", "叔叔", "叔父", "二叔", "老叔", "舅妈"}),
+    ('divorce', {"单亲", "离婚", "离异"}),
+    ('unemployed', {"无业", "一方无业", "均无业", "失业", "无法工作", "下岗", "公司破产", "无工作", "待业", "倒闭", "离职", "未有收入", "无收入",
+        "停产", "失去稳定工作", "没能工作"}),
+    ('dead', {"去世", "离世", "病逝", "死亡", "治丧", "身亡", "病故"}),
+    ('illness', {"病", "病了", "就医", "发病", "有病", "多病", "车祸", "住院", "养病", "疾病", "病情", "受伤", "顽疾", "服药", "腰伤",
+        "慢性疾病", "普通疾病", "一般疾病", "生病", "患病", "带病", "患疾", "皮肤病", "高血压", "高血糖", "高血脂", "风湿", "类风湿", "风湿病", "心脏病",
+        "糖尿病", "三高", "囊肿", "肝囊肿", "结石", "肾结石", "胆结石", "结石病", "尿结石", "肾囊肿", "肾积水", "脑溢血", "脑血栓", "心脑血管疾病",
+        "心脑疾病", "青光眼", "慢阻肺", "中风", "白内障", "肺结核", "冠心病", "甲亢", "癫痫", "股骨头坏死", "腿脚不便", "精神病", "精神疾病", "精神分裂症",
+        "精神性疾病", "气胸", "胃穿孔", "骨折", "骨裂", "红斑狼疮", "腰椎间盘突出", "腰间盘突出", "关节炎", "骨质增生", "胃溃疡", "手术", "腿疾", "胃病",
+        "感染", "胰腺炎", "溃烂", "摔伤", "腿伤", "睡眠障碍", "工伤", "视网膜", "白癜风", "关节病", "颈椎病", "胆囊炎", "坠楼", "瘸", "贫血", "脱髓鞘",
+        "事故", "意外事故", "体弱", "卷入机器", "气管炎", "支气管炎", "卧病", "交通事故", "吃药", "胃出血", "脑出血", "颅内出血", "子宫肌瘤", "腰椎",
+        "颈椎", "腰椎病", "后遗症", "割伤", "脑垂体瘤", "脊椎炎", "扎伤", "烫伤", "肺气肿", "卧床", "断裂", "眼疾", "伤手", "摔了", "旧病复发", "切断",
+        "摔到"}),
+    ('serious_illness', {"大病", "病重", "重病", "重疾", "重大疾病", "肌无力", "肿瘤", "瘤", "白血病", "癌", "患癌", "癌症", "肝癌", "食道癌",
+        "卵巢癌", "甲状腺癌", "肺癌", "宫颈癌", "脑癌", "直肠癌", "乳腺癌", "胃癌", "肺腺癌", "贲门癌", "喷门癌", "肠癌", "乳癌", "结肠癌", "前列腺癌",
+        "致癌", "肾癌", "淋巴癌", "心梗", "心肌梗塞", "脑中风", "移植", "搭桥", "支架", "肾炎", "肾病综合征", "肾综合", "严重肾病", "肾衰竭", "尿毒症",
+        "截肢", "肝病", "肝硬化", "肝炎", "干重活", "做重活", "不能工作", "失去劳动力", "丧失劳动力", "丧失行动力", "无法劳作", "丧失劳动能力", "失去部分劳动力",
+        "失去全部劳动力", "无法承受过重劳动", "失去行动能力", "干不了", "不能劳作", "不得剧烈运动", "脑梗", "脑梗塞", "脑梗死", "脑膜炎", "脑膜瘤", "昏迷", "聋",
+        "失聪", "耳聋", "聋哑人", "聋哑", "失明", "瘫痪", "偏瘫", "脑瘫", "截瘫", "致瘫", "帕金森", "瓣膜病", "痴呆", "老年痴呆", "老年痴呆症", "烧伤",
+        "火烧", "语言", "贫血", "主动脉", "残疾", "残废", "伤残", "摔断", "砸断", "神志不清", "骨髓瘤", "致残", "脑萎缩", "脑血管", "脑结核",
+        "半身不遂", "致盲", "病危", "再生性贫血障碍", "生活无法自理", "做手术"}),
+]
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    多关键字匹配器（Aho-Corasick自动机）
+
+    由若干张关键字表一次性构建，每张表对应一个输出的布尔特征。对每个字符串只扫描一遍，
+    用一个整数位掩码记录命中了哪些表，第i张表对应第i位。
+    除了子串匹配外，还支持整串精确匹配的表（相当于原来的 x in list）。
+    """
+
+    def __init__(self, patterns: dict, exact: dict = None):
+        """
+        Args:
+            patterns: {特征名: 关键字序列}，字符串中出现任意一个关键字即为True
+            exact: {特征名: 字符串序列}，字符串与其中某一项完全相同即为True，
+                特征名可以与patterns中的重复，结果取或
+        """
+        exact = exact or {}
+        self.names = list(patterns)
+        self.names += [k for k in exact if k not in patterns]
+        bit = {name: 1 << i for i, name in enumerate(self.names)}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        for name, words in patterns.items():
+            for word in words:
+                self._insert(word, bit[name])
+        self._build_fail()
+        self._exact = {}
+        for name, words in exact.items():
+            for word in words:
+                self._exact[word] = self._exact.get(word, 0) | bit[name]
+
+    def _insert(self, word: str, mask: int):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+            state = nxt
+        self._out[state] |= mask
+
+    def _build_fail(self):
+        # 第一层节点的失配指针都指向根，从第二层开始按层求
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def scan(self, text) -> int:
+        """
+        扫描一个字符串
+
+        Args:
+            text: 待匹配的字符串，非字符串（如缺失值）视为没有命中
+
+        Returns: 命中的位掩码
+
+        """
+        if not isinstance(text, str):
+            return 0
+        goto, fail, out = self._goto, self._fail, self._out
+        mask = self._exact.get(text, 0)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            mask |= out[state]
+        return mask
+
+    def masks(self, s: pd.Series) -> np.ndarray:
+        """
+        对一列字符串求位掩码，相同的字符串只扫描一次
+
+        Args:
+            s: pandas.Series
+
+        Returns: 与s等长的numpy.ndarray(int64)
+
+        """
+        codes, uniques = pd.factorize(s)
+        table = np.fromiter((self.scan(x) for x in uniques), dtype='int64', count=len(uniques))
+        # 缺失值的code为-1，放在表的最后一位
+        table = np.append(table, 0)
+        return table[codes]
+
+    def transform(self, s: pd.Series) -> pd.DataFrame:
+        """
+        对一列字符串生成所有特征
+
+        Args:
+            s: pandas.Series
+
+        Returns: pandas.DataFrame，每张关键字表一列布尔特征，索引与s相同
+
+        """
+        m = self.masks(s)
+        return pd.DataFrame(
+            {name: (m >> i) & 1 == 1 for i, name in enumerate(self.names)},
+            index=s.index
+        )
@@ -74,7 +74,7 @@ def plot_tsne(data: DataSet, filename: str, n_iter: int = 1000):
     Returns:
 
     """
-    X = MinMaxScaler().fit_transform(data.features)
+    X = MinMaxScaler().fit_transform(data.matrix())
     X_embed = TSNE(n_components=3, n_iter=n_iter, init='random', n_jobs=-1).fit_transform(X)
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
@@ -102,7 +102,7 @@ def plot_tsne_ssl(data: DataSet, filename: str, n_iter: int = 1000):
         n_iter: 迭代次数
 
     """
-    X = MinMaxScaler().fit_transform(data.features)
+    X = MinMaxScaler().fit_transform(data.matrix())
     # X = data.features
     X_embed = TSNE(n_components=3, n_iter=n_iter, init='random', n_jobs=-1).fit_transform(X)
     fig = plt.figure()
@@ -1,15 +1,12 @@
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 # from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import f1_score, accuracy_score
-from sklearn.metrics import confusion_matrix
-from joblib import dump, load
 import numpy as np
 import pandas as pd
-from time import strftime, localtime
 from .data import DataSet
-from .plot import plot_confusion_matrix
+from .search import run_search
+from .evaluate import report_search
 
 
 @DeprecationWarning
@@ -61,19 +58,25 @@ def best_low_complexity(cv_results: dict):
 
 
 def grid_search_and_result(
-        Xtrain: pd.DataFrame,
-        ytrain: pd.Series,
-        Xtest: pd.DataFrame,
-        ytest: pd.Series,
+        Xtrain: np.ndarray,
+        ytrain: np.ndarray,
+        Xtest: np.ndarray,
+        ytest: np.ndarray,
         pipe: Pipeline,
         grid: dict,
         log_dir: str,
         score=None,
         verbose: int = 2,
         k: int = 5,
-        fit_params: dict = None):
+        fit_params: dict = None,
+        search: str = 'grid',
+        search_params: dict = None,
+        cache=None,
+        n_jobs: int = -1,
+        threads: int = None,
+        features: list = None):
     """
-    交叉验证网格搜索，测试集和训练集得分，混淆矩阵和ROC曲线绘制
+    交叉验证网格搜索，测试集和训练集得分和混淆矩阵，见evaluate.report_search
 
     Args:
         Xtrain: 训练集特征
@@ -87,8 +90,15 @@ def grid_search_and_result(
         verbose: 日志级别，0为静默
         k: 交叉验证折数
         fit_params: 训练时参数
+        search: 搜索策略，'grid'为穷举，'halving'为逐次减半，'racing'为先用前几折淘汰，见search.make_search
+        search_params: 搜索策略的其他参数
+        cache: 预处理步骤的缓存，True使用临时目录，字符串为缓存目录，也可以给出search.PipelineCache，默认不缓存
+        n_jobs: 交叉验证并行的进程数
+        threads: 每个进程中模型自身和BLAS等线程库的线程数，见search.run_search
+        features: 训练特征的中文名，记在搜索模型和最佳模型的training_features_属性上，
+            之后可以直接用模型指定要生成的特征，见data.resolve_features
 
-    Returns: 训练好的GridSearchCV模型
+    Returns: 训练好的搜索模型
 
     """
     scoring = score
@@ -97,47 +107,17 @@ def grid_search_and_result(
             'f1': 'f1_macro',
             'accuracy': 'accuracy'
         }
-    gsCV = GridSearchCV(
-        estimator=pipe,
-        cv=k, n_jobs=-1,
-        param_grid=grid,
-        scoring=scoring,
-        refit='f1',
-        verbose=verbose
-    )
-    if fit_params is None:
-        gsCV.fit(Xtrain, ytrain)
-    else:
-        gsCV.fit(Xtrain, ytrain, **fit_params)
-    dump(gsCV, log_dir + '/gsCV')
-    dump(gsCV.best_estimator_, log_dir + '/best_model')
-    file_prefix = log_dir + '/' + strftime("%Y_%m_%d_%H_%M_%S", localtime())
-    file = open(file_prefix + '.log.txt', 'x')
-    if verbose > 2:
-        file.write(gsCV.cv_results_.__str__())
-    if verbose:
-        file.write(gsCV.get_params().__str__())
-        file.write('\nBest score on training set by grid search cross validation: {}\n'
-                   .format(gsCV.score(Xtrain, ytrain)))
-    best_model = load(log_dir + '/best_model')
-    test_prediction = best_model.predict(Xtest)
-    file.write('Accuracy on test set: {}\n'.format(accuracy_score(ytest, test_prediction)))
-    file.write('F1-score on test set: {}\n'.format(f1_score(ytest, test_prediction, average='macro')))
-    if verbose:
-        cm = confusion_matrix(ytrain, best_model.predict(Xtrain))
-        plot_confusion_matrix(cm, ['特别困难', '一般困难', '不困难'], file_prefix + '_train_cm.png')
-        file.write('\ntrain_cm:\n')
-        file.write(cm.__str__())
-        cm = confusion_matrix(ytest, test_prediction)
-        plot_confusion_matrix(cm, ['特别困难', '一般困难', '不困难'], file_prefix + '_test_cm.png')
-        file.write('\ntest_cm:\n')
-        file.write(cm.__str__())
-    #         plot_roc(best_model, Xtest, ytest, file_prefix + '_roc.png')
-    file.close()
+    gsCV = run_search(pipe, grid, Xtrain, ytrain, scoring, 'f1', k, verbose, n_jobs, search, search_params, cache,
+                      fit_params, threads)
+    classes = ['特别困难', '一般困难', '不困难']
+    if features is not None:
+        gsCV.training_features_ = gsCV.best_estimator_.training_features_ = list(features)
+    report_search(gsCV, log_dir, Xtrain, ytrain, Xtest, ytest, classes, classes, verbose)
     return gsCV
 
 
-def do_decision_tree(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_decision_tree(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+                     search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练决策树
 
@@ -145,8 +125,13 @@ def do_decision_tree(dataset: DataSet, log_dir: str = '../log', grid: dict = Non
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from sklearn.tree import DecisionTreeClassifier
@@ -164,11 +149,14 @@ def do_decision_tree(dataset: DataSet, log_dir: str = '../log', grid: dict = Non
         ('scaler', MinMaxScaler()),
         ('dt', DecisionTreeClassifier())
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
 
 
-def do_random_forest(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_random_forest(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+                     search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练随机森林
 
@@ -176,8 +164,13 @@ def do_random_forest(dataset: DataSet, log_dir: str = '../log', grid: dict = Non
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from sklearn.ensemble import RandomForestClassifier
@@ -210,11 +203,14 @@ def do_random_forest(dataset: DataSet, log_dir: str = '../log', grid: dict = Non
         ('scaler', MinMaxScaler()),
         ('rf', RandomForestClassifier(max_depth=None, n_jobs=-1))
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
 
 
-def do_svm(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_svm(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+           search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练支持向量机
 
@@ -222,8 +218,13 @@ def do_svm(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from sklearn.svm import SVC
@@ -254,11 +255,14 @@ def do_svm(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
         ('scaler', MinMaxScaler()),
         ('SVM', SVC(cache_size=500))
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
 
 
-def do_logistic(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_logistic(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+                search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练逻辑回归
 
@@ -266,8 +270,13 @@ def do_logistic(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from sklearn.linear_model import LogisticRegression
@@ -286,11 +295,14 @@ def do_logistic(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
         ('scaler', MinMaxScaler()),
         ('Logistic', LogisticRegression(n_jobs=-1, max_iter=500))
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
 
 
-def do_naive_bayes(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_naive_bayes(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+                   search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练朴素贝叶斯
 
@@ -298,8 +310,13 @@ def do_naive_bayes(dataset: DataSet, log_dir: str = '../log', grid: dict = None)
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from sklearn.naive_bayes import GaussianNB
@@ -311,11 +328,14 @@ def do_naive_bayes(dataset: DataSet, log_dir: str = '../log', grid: dict = None)
         ('scaler', MinMaxScaler()),
         ('NB', GaussianNB())
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    return grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
 
 
-def do_xgb(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_xgb(dataset: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+           search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     训练Xgboost
 
@@ -323,8 +343,13 @@ def do_xgb(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         dataset:输入数据集，将会按照0.7, 0.3比例分为训练集和测试集
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from xgboost import XGBClassifier
@@ -350,8 +375,10 @@ def do_xgb(dataset: DataSet, log_dir: str = '../log', grid: dict = None):
             )
         )
     ])
-    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.features, dataset.label, train_size=0.7)
-    gscv = grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    Xtrain, Xtest, ytrain, ytest = train_test_split(dataset.matrix(), dataset.label.to_numpy(), train_size=0.7)
+    gscv = grid_search_and_result(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                  search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                  threads=threads, features=list(dataset.features_name.values()))
     best_model = gscv.best_estimator_
     file = open(log_dir + '/feature.txt', 'a')
     file.write('\nfeature importance\n')
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+import tracemalloc
+
+
+class FeatureReport:
+    """
+    generate_feature中各个特征提取函数的运行统计
+
+    每个函数一条记录：耗时、每秒处理行数、输入的不同取值个数、内存峰值增量，
+    需要分词的函数还有分词缓存的命中率。并行时耗时为各进程处理各块的时间之和，内存峰值为各块的最大值；
+    需要分词的函数在主进程中运行，耗时包括等待进程池分词的时间。
+    """
+
+    def __init__(self, rows: int, n_jobs: int = 1):
+        """
+        Args:
+            rows: 数据行数
+            n_jobs: 进程数
+        """
+        self.rows = rows
+        self.n_jobs = n_jobs
+        self.total_seconds = 0.
+        self.extractors = []
+
+    def add(self, name: str, distinct: int, stats: list):
+        """
+        记录一个特征提取函数的统计
+
+        Args:
+            name: 函数名
+            distinct: 输入的不同取值（多列时为不同的行）个数
+            stats: 各块的统计，见measure的返回值
+
+        """
+        seconds = sum(s['seconds'] for s in stats)
+        record = {
+            'name': name,
+            'rows': self.rows,
+            'seconds': seconds,
+            'rows_per_second': self.rows / seconds if seconds > 0 else None,
+            'distinct': distinct,
+            'peak_memory': max((s['peak_memory'] for s in stats), default=0)
+        }
+        if any('hits' in s for s in stats):
+            hits = sum(s.get('hits', 0) for s in stats)
+            misses = sum(s.get('misses', 0) for s in stats)
+            record['cache_hits'] = hits
+            record['cache_misses'] = misses
+            record['cache_hit_rate'] = hits / (hits + misses) if hits + misses else None
+        self.extractors.append(record)
+
+    def to_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'n_jobs': self.n_jobs,
+            'total_seconds': self.total_seconds,
+            'extractors': self.extractors
+        }
+
+    def to_json(self, path: str):
+        """
+        写成json文件，path为目录时写到该目录下的feature_report.json
+
+        Args:
+            path: 文件或目录路径
+
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, 'feature_report.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def __str__(self):
+        lines = ['{:<18}{:>10}{:>14}{:>10}{:>12}{:>10}'.format(
+            'extractor', 'seconds', 'rows/s', 'distinct', 'peak(KiB)', 'hit rate')]
+        for r in self.extractors:
+            hit_rate = r.get('cache_hit_rate')
+            lines.append('{:<18}{:>10.3f}{:>14.0f}{:>10d}{:>12.0f}{:>10}'.format(
+                r['name'], r['seconds'], r['rows_per_second'] or 0, r['distinct'], r['peak_memory'] / 1024,
+                '-' if hit_rate is None else '{:.1%}'.format(hit_rate)))
+        lines.append('total {:.3f}s for {} rows'.format(self.total_seconds, self.rows))
+        return '\n'.join(lines)
+
+
+def measure(func, *args, tokenizer=None) -> tuple:
+    """
+    调用func并统计耗时和内存峰值增量
+
+    Args:
+        func: 被统计的函数
+        *args: func的参数
+        tokenizer: func使用的CachedTokenizer，不为空时同时统计分词缓存的命中次数
+
+    Returns: (func的返回值, 统计的dict)
+
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    # Python 3.9之前没有reset_peak，外面已经在跟踪内存时峰值可能偏大
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    before = tokenizer.stats() if tokenizer is not None else None
+    start = time.perf_counter()
+    res = func(*args)
+    seconds = time.perf_counter() - start
+    stats = {'seconds': seconds, 'peak_memory': tracemalloc.get_traced_memory()[1] - base}
+    if not tracing:
+        tracemalloc.stop()
+    if before is not None:
+        after = tokenizer.stats()
+        stats['hits'] = after['hits'] - before['hits']
+        stats['misses'] = after['misses'] - before['misses']
+    return res, stats
@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from joblib.externals.loky import get_reusable_executor
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+
+def allocate(n_tasks: int, cores: int = None, max_concurrent: int = None, threads: int = 1) -> tuple:
+    """
+    在总的核数预算内给同时运行的搜索分配进程数和线程数
+
+    每个任务分到cores // 同时运行的任务数个核，再分给交叉验证的进程和每个进程中的线程
+
+    Args:
+        n_tasks: 搜索任务个数
+        cores: 总核数，默认为本机的CPU数
+        max_concurrent: 最多同时运行的任务数，默认为任务个数（不超过核数）
+        threads: 每个进程中模型自身和BLAS等线程库的线程数，不超过每个任务分到的核数
+
+    Returns: (同时运行的任务数, 每个任务交叉验证并行的进程数, 每个进程的线程数)
+
+    """
+    cores = cores or os.cpu_count() or 1
+    concurrent = max(1, min(n_tasks, max_concurrent or n_tasks, cores))
+    budget = max(1, cores // concurrent)
+    threads = max(1, min(threads or 1, budget))
+    return concurrent, budget // threads, threads
+
+
+def _run_task(func, args: tuple, kwargs: dict, n_jobs: int, threads: int) -> tuple:
+    start = time.perf_counter()
+    try:
+        # 任务进程中的线程库（如评估时的predict）同样不超过分到的线程数
+        with threadpool_limits(limits=threads):
+            result = func(*args, n_jobs=n_jobs, threads=threads, **kwargs)
+    finally:
+        if n_jobs != 1:
+            # 任务进程退出时会等待joblib的loky进程，而它们空闲300秒后才退出，这里直接关掉。
+            # reuse=True取到交叉验证用过的那个进程池，不会按默认参数重新建一个
+            executor = get_reusable_executor(reuse=True)
+            getattr(executor, 'terminate', executor.shutdown)()
+    return result, time.perf_counter() - start
+
+
+def run_tasks(tasks: dict, cores: int = None, max_concurrent: int = None, threads: int = 1) -> dict:
+    """
+    在总的核数预算内同时运行多个模型的搜索
+
+    每个任务在单独的进程中运行，各自的交叉验证用分到的n_jobs个进程，每个进程中模型自身和BLAS用threads个线程
+    （见allocate和search.run_search），所有任务的线程数之和不超过cores。全部任务的用时接近最慢的一个，而不是各个任务用时之和。
+
+        run_tasks({'svm': (do_svm, (data, 'log/svm'), {}), 'rf': (do_random_forest, (data, 'log/rf'), {})})
+
+    Args:
+        tasks: {任务名: (训练函数, 位置参数, 关键字参数)}，训练函数须接受n_jobs和threads参数，如primary中的do_*
+        cores: 总核数，默认为本机的CPU数
+        max_concurrent: 最多同时运行的任务数
+        threads: 每个交叉验证进程的线程数，见allocate
+
+    Returns: {任务名: 训练函数的返回值}，出错的任务为其异常
+
+    """
+    if not tasks:
+        return {}
+    concurrent, n_jobs, threads = allocate(len(tasks), cores, max_concurrent, threads)
+    logger.info('Running %d searches, %d at a time with n_jobs=%d and %d threads each',
+                len(tasks), concurrent, n_jobs, threads)
+    results = {}
+    with ProcessPoolExecutor(max_workers=concurrent) as pool:
+        futures = {
+            pool.submit(_run_task, func, tuple(args), dict(kwargs), n_jobs, threads): name
+            for name, (func, args, kwargs) in tasks.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name], seconds = future.result()
+                logger.info('%s complete in %.1fs', name, seconds)
+            except Exception as e:
+                results[name] = e
+                logger.exception('%s failed', name)
+    return {name: results[name] for name in tasks}
@@ -0,0 +1,536 @@
+import os
+import re
+import time
+import shutil
+import logging
+import sklearn
+import tempfile
+from contextlib import nullcontext
+from sklearn.base import BaseEstimator, clone
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, ParameterGrid, check_cv
+from sklearn.pipeline import Pipeline
+from joblib import Memory, parallel_backend, effective_n_jobs
+from scipy.stats import rankdata
+from threadpoolctl import threadpool_limits
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEARCH_STRATEGIES = ['grid', 'halving', 'racing']
+
+
+def _single_metric(scoring, refit: str):
+    # 逐次减半只支持一个评分指标，用refit所用的指标
+    if isinstance(scoring, dict):
+        return scoring[refit]
+    return scoring
+
+
+def _sklearn_version() -> tuple:
+    # 只取主版本号和次版本号，如'1.3.2'为(1, 3)，'0.24.0'为(0, 24)
+    return tuple(int(x) for x in re.findall(r'\d+', sklearn.__version__)[:2])
+
+
+def _logistic(p: dict, default: dict, n_classes: int = None) -> bool:
+    # 见LogisticRegression._check_solver：newton-cg、lbfgs、sag只支持l2和不加正则，liblinear不支持elasticnet和不加正则
+    solver, penalty = p['solver'], p['penalty']
+    version = _sklearn_version()
+    # 1.8起penalty默认为'deprecated'，正则的种类由l1_ratio决定
+    explicit = penalty != 'deprecated'
+    if not explicit:
+        ratio = p['l1_ratio']
+        penalty = 'l2' if not ratio else 'l1' if ratio == 1 else 'elasticnet'
+    # 不加正则在0.24中写作'none'，1.2起写作None，1.4起不再接受'none'
+    if penalty == 'none' and version >= (1, 4) or penalty is None and version < (1, 2):
+        return False
+    no_penalty = penalty in ('none', None)
+    if solver in ('newton-cg', 'lbfgs', 'sag') and penalty != 'l2' and not no_penalty:
+        return False
+    if solver == 'liblinear' and penalty not in ('l1', 'l2'):
+        return False
+    # liblinear本身只能做二分类，1.8起多分类时不再自动一对多，直接报错
+    if solver == 'liblinear' and n_classes is not None and n_classes > 2 and version >= (1, 8):
+        return False
+    # 对偶形式只有liblinear加l2正则实现了
+    if p['dual'] and (solver != 'liblinear' or penalty != 'l2'):
+        return False
+    if penalty == 'elasticnet':
+        if p['l1_ratio'] is None or not 0 <= p['l1_ratio'] <= 1:
+            return False
+    elif explicit:
+        p['l1_ratio'] = default['l1_ratio']
+    if no_penalty:
+        p['C'] = default['C']
+    if solver != 'liblinear' or not p['fit_intercept']:
+        p['intercept_scaling'] = default['intercept_scaling']
+    return True
+
+
+def _svc(p: dict, default: dict, n_classes: int = None) -> bool:
+    # break_ties只能与ovr同时使用
+    if p['break_ties'] and p['decision_function_shape'] == 'ovo':
+        return False
+    if p['kernel'] != 'poly':
+        p['degree'] = default['degree']
+    if p['kernel'] not in ('poly', 'sigmoid'):
+        p['coef0'] = default['coef0']
+    if p['kernel'] == 'linear':
+        p['gamma'] = default['gamma']
+    # SVC训练时总是一对一，不打破平局时predict的结果与decision_function_shape无关
+    if not p['break_ties']:
+        p['decision_function_shape'] = default['decision_function_shape']
+    return True
+
+
+def _tree(p: dict, default: dict, n_classes: int = None) -> bool:
+    split = p['min_samples_split']
+    if isinstance(split, int) and split < 2:
+        return False
+    # 分类树的'auto'就是'sqrt'，1.3起不再接受'auto'
+    if p['max_features'] == 'auto':
+        p['max_features'] = 'sqrt'
+    return True
+
+
+def _forest(p: dict, default: dict, n_classes: int = None) -> bool:
+    if not _tree(p, default):
+        return False
+    if p['oob_score'] and not p['bootstrap']:
+        return False
+    return True
+
+
+# 各模型的参数约束：返回False表示该组参数在当前安装的scikit-learn中、对n_classes个类别无法训练，
+# 无关的参数改为模型的默认值
+_CONSTRAINTS = {
+    'LogisticRegression': _logistic,
+    'SVC': _svc,
+    'DecisionTreeClassifier': _tree,
+    'RandomForestClassifier': _forest,
+}
+# 搜索时每个候选都clone出新模型只训练一次，warm_start没有作用
+_NO_EFFECT = ['warm_start']
+
+
+def expand_grid(pipe: Pipeline, grid: dict, n_classes: int = None) -> tuple:
+    """
+    按模型的参数约束展开网格：去掉无法训练的参数组合，
+    对当前参数取值没有影响的参数统一改为模型的默认值，再去掉重复的候选。
+    哪些组合无法训练按当前安装的scikit-learn版本判断（如'none'正则在1.4中去掉了），有的还与类别数有关
+
+    Args:
+        pipe: 模型管道，网格的参数名为 步骤名__参数名
+        grid: 超参数搜索空间，dict或dict的列表
+        n_classes: 训练标签的类别数，不填则不检查与类别数有关的约束
+
+    Returns: (候选列表，可直接作为GridSearchCV的param_grid, 展开前的候选个数)
+
+    """
+    steps = {}
+    for key in (set().union(*grid) if isinstance(grid, list) else grid):
+        step, _, name = key.partition('__')
+        steps.setdefault(step, []).append(name)
+    rules = []
+    for step, names in steps.items():
+        est = pipe.named_steps.get(step) if isinstance(pipe, Pipeline) else None
+        if est is None:
+            continue
+        rule = _CONSTRAINTS.get(type(est).__name__)
+        default = est.get_params(deep=False)
+        rules.append((step, names, rule, default))
+    candidates = {}
+    total = 0
+    for point in ParameterGrid(grid):
+        total += 1
+        valid = True
+        for step, names, rule, default in rules:
+            p = dict(default)
+            p.update({n: point[step + '__' + n] for n in names})
+            for n in _NO_EFFECT:
+                if n in p:
+                    p[n] = default[n]
+            if rule is not None and not rule(p, default, n_classes):
+                valid = False
+                break
+            point.update({step + '__' + n: p[n] for n in names})
+        if valid:
+            candidates.setdefault(repr(sorted(point.items())), point)
+    return [{k: [v] for k, v in point.items()} for point in candidates.values()], total
+
+
+def make_search(
+        pipe: Pipeline,
+        grid: dict,
+        scoring,
+        refit: str = 'f1',
+        k: int = 5,
+        verbose: int = 2,
+        n_jobs: int = -1,
+        search: str = 'grid',
+        search_params: dict = None,
+        expand: bool = True,
+        n_classes: int = None):
+    """
+    按搜索策略构造超参数搜索模型
+
+    - grid: 穷举搜索，即GridSearchCV
+    - halving: 逐次减半搜索（HalvingGridSearchCV），所有候选先用少量资源评估，每轮只保留最好的1/factor，
+      留下的候选分到更多资源。资源默认是训练样本数，也可以是模型的参数，如search_params={'resource': 'rf__n_estimators'}，
+      此时该参数从网格中去掉，网格中的最大值作为max_resources
+    - racing: 先用前几折评估所有候选，平均得分比最好的候选低tolerance以上（或训练失败）的直接淘汰，
+      剩下的候选只在其余各折上评估，与前几折的得分合并，见RacingSearchCV
+
+    Args:
+        pipe: 模型管道
+        grid: 超参数搜索空间
+        scoring: 评分指标
+        refit: 最后用来选择并重新训练最佳模型的指标
+        k: 交叉验证折数
+        verbose: 日志级别，0为静默
+        n_jobs: 并行的进程数
+        search: 搜索策略，'grid'、'halving'或'racing'
+        search_params: 搜索策略的其他参数，传给对应的搜索模型
+        expand: 是否先用expand_grid去掉无效和重复的候选
+        n_classes: 训练标签的类别数，见expand_grid
+
+    Returns: 未训练的搜索模型，接口与GridSearchCV相同
+
+    """
+    search_params = dict(search_params or {})
+    resource = search_params.get('resource', 'n_samples')
+    if search == 'halving' and resource != 'n_samples':
+        # 网格为dict的列表时每个dict都要去掉资源参数
+        grids = [dict(g) for g in (grid if isinstance(grid, list) else [grid])]
+        values = [v for g in grids for v in g.pop(resource, [])]
+        if values:
+            search_params.setdefault('max_resources', max(values))
+        grid = grids if isinstance(grid, list) else grids[0]
+    total = None
+    if expand:
+        grid, total = expand_grid(pipe, grid, n_classes)
+        logger.info('Grid expanded from %d to %d candidates, %d fits saved', total, len(grid), (total - len(grid)) * k)
+    model = _make_search(pipe, grid, scoring, refit, k, verbose, n_jobs, search, search_params)
+    # 展开前的候选个数，search_summary写入报告；不展开时为None
+    model.expanded_from_ = total
+    return model
+
+
+def _make_search(pipe, grid, scoring, refit, k, verbose, n_jobs, search, search_params):
+    if search == 'grid':
+        return GridSearchCV(
+            estimator=pipe,
+            cv=k, n_jobs=n_jobs,
+            param_grid=grid,
+            scoring=scoring,
+            refit=refit,
+            verbose=verbose,
+            **search_params
+        )
+    if search == 'halving':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+        return HalvingGridSearchCV(
+            estimator=pipe,
+            cv=k, n_jobs=n_jobs,
+            param_grid=grid,
+            scoring=_single_metric(scoring, refit),
+            refit=True,
+            verbose=verbose,
+            **search_params
+        )
+    if search == 'racing':
+        return RacingSearchCV(pipe, grid, scoring, refit, k, verbose, n_jobs, **search_params)
+    raise ValueError('unknown search strategy {}, expected one of {}'.format(search, SEARCH_STRATEGIES))
+
+
+def _merge_results(race: dict, alive: np.ndarray, rest: dict, n_race: int, n_rest: int) -> dict:
+    """
+    把淘汰时前n_race折的结果（只取留下的候选）与剩下n_rest折的结果合并成一份完整的cv_results_
+
+    Args:
+        race: 淘汰用的GridSearchCV的cv_results_
+        alive: 留下的候选在race中的位置
+        rest: 留下的候选在剩下各折上的cv_results_，候选顺序与alive相同
+        n_race: 淘汰用的折数
+        n_rest: 剩下的折数
+
+    Returns: dict，格式与GridSearchCV的cv_results_相同
+
+    """
+    n = n_race + n_rest
+    results = {k: v for k, v in rest.items() if k == 'params' or k.startswith('param_')}
+    for name in ('fit_time', 'score_time'):
+        m1, s1 = race['mean_' + name][alive], race['std_' + name][alive]
+        m2, s2 = rest['mean_' + name], rest['std_' + name]
+        mean = (n_race * m1 + n_rest * m2) / n
+        square = (n_race * (s1 ** 2 + m1 ** 2) + n_rest * (s2 ** 2 + m2 ** 2)) / n
+        results['mean_' + name] = mean
+        results['std_' + name] = np.sqrt(np.maximum(square - mean ** 2, 0))
+    for metric in [k[len('mean_test_'):] for k in rest if k.startswith('mean_test_')]:
+        splits = [race['split{}_test_{}'.format(i, metric)][alive] for i in range(n_race)]
+        splits += [rest['split{}_test_{}'.format(i, metric)] for i in range(n_rest)]
+        for i, v in enumerate(splits):
+            results['split{}_test_{}'.format(i, metric)] = v
+        scores = np.column_stack(splits)
+        mean = scores.mean(axis=1)
+        results['mean_test_' + metric] = mean
+        results['std_test_' + metric] = scores.std(axis=1)
+        # 与GridSearchCV相同，得分为nan的候选排在最后
+        results['rank_test_' + metric] = rankdata(-np.nan_to_num(mean, nan=-np.inf), method='min').astype(np.int32)
+    return results
+
+
+class RacingSearchCV(BaseEstimator):
+    """
+    带淘汰的网格搜索
+
+    先在前race_folds折上评估网格中所有候选，平均得分比最好的候选低tolerance以上的认为没有希望，
+    不再评估剩下的折；训练失败（得分为nan）的候选同样淘汰。留下的候选只在剩下的折上评估，
+    与前几折已有的得分合并成完整的k折结果，前几折不会重复训练，结果与只在这些候选上做网格搜索相同。
+    cv_results_、best_params_、best_score_等的含义与GridSearchCV相同，
+    最后用refit指标最好的参数在全部训练数据上训练best_estimator_，predict等方法交给它。
+    """
+
+    def __init__(self, estimator: Pipeline, param_grid, scoring, refit: str = 'f1', cv: int = 5,
+                 verbose: int = 2, n_jobs: int = -1, race_folds: int = 2, tolerance: float = 0.05,
+                 min_candidates: int = 1):
+        """
+        Args:
+            estimator: 模型管道
+            param_grid: 超参数搜索空间，dict或dict的列表
+            scoring: 评分指标
+            refit: 淘汰和最后选择模型所用的指标
+            cv: 交叉验证折数
+            verbose: 日志级别
+            n_jobs: 并行的进程数
+            race_folds: 用来淘汰的折数
+            tolerance: 淘汰的得分差距
+            min_candidates: 至少保留的候选个数
+        """
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.refit = refit
+        self.cv = cv
+        self.verbose = verbose
+        self.n_jobs = n_jobs
+        self.race_folds = race_folds
+        self.tolerance = tolerance
+        self.min_candidates = min_candidates
+
+    def _search(self, param_grid, cv) -> GridSearchCV:
+        # 各阶段只评估，不训练最终模型
+        return GridSearchCV(
+            estimator=self.estimator,
+            cv=cv, n_jobs=self.n_jobs,
+            param_grid=param_grid,
+            scoring=self.scoring,
+            refit=False,
+            verbose=self.verbose
+        )
+
+    def fit(self, X, y, **fit_params):
+        """
+        先淘汰，再只在剩下的折上评估留下的候选，最后用最好的参数训练
+
+        Args:
+            X: 训练集特征
+            y: 训练集标签
+            **fit_params: 训练时参数
+
+        Returns: self
+
+        """
+        folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        metric = self.refit if isinstance(self.scoring, dict) else 'score'
+        candidates = list(ParameterGrid(self.param_grid))
+        n_race = self.race_folds if len(candidates) > self.min_candidates and self.race_folds < len(folds) else 0
+        if n_race:
+            race = self._search(self.param_grid, folds[:n_race]).fit(X, y, **fit_params)
+            candidates = race.cv_results_['params']
+            scores = np.nan_to_num(np.asarray(race.cv_results_['mean_test_' + metric], dtype=float), nan=-np.inf)
+            alive = scores >= scores.max() - self.tolerance
+            if alive.sum() < self.min_candidates:
+                alive[np.argsort(-scores, kind='stable')[:self.min_candidates]] = True
+        else:
+            alive = np.ones(len(candidates), dtype=bool)
+        survivors = [p for p, a in zip(candidates, alive) if a]
+        self.n_candidates_ = len(candidates)
+        self.n_survivors_ = len(survivors)
+        # 每轮淘汰的折数、参加的候选数和留下的候选数，search_summary写入报告
+        self.racing_history_ = [{'folds': n_race, 'candidates': self.n_candidates_, 'survivors': self.n_survivors_}]
+        logger.info('Racing kept %d of %d candidates after %d folds', self.n_survivors_, self.n_candidates_, n_race)
+        rest = self._search([{k: [v] for k, v in p.items()} for p in survivors], folds[n_race:]).fit(X, y, **fit_params)
+        if n_race:
+            self.cv_results_ = _merge_results(race.cv_results_, np.flatnonzero(alive), rest.cv_results_,
+                                              n_race, len(folds) - n_race)
+        else:
+            self.cv_results_ = rest.cv_results_
+        self.n_splits_ = len(folds)
+        self.multimetric_ = isinstance(self.scoring, dict)
+        self.best_index_ = int(np.argmin(self.cv_results_['rank_test_' + metric]))
+        self.best_params_ = self.cv_results_['params'][self.best_index_]
+        self.best_score_ = self.cv_results_['mean_test_' + metric][self.best_index_]
+        start = time.perf_counter()
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+        self.refit_time_ = time.perf_counter() - start
+        return self
+
+    def score(self, X, y) -> float:
+        """
+        用refit指标给最佳模型评分，与GridSearchCV.score相同
+
+        Args:
+            X: 特征
+            y: 标签
+
+        Returns: float
+
+        """
+        scoring = self.scoring[self.refit] if isinstance(self.scoring, dict) else self.scoring
+        return check_scoring(self.best_estimator_, scoring)(self.best_estimator_, X, y)
+
+    def __getattr__(self, name):
+        # predict、predict_proba、classes_等交给最佳模型
+        if name == 'best_estimator_' or name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.best_estimator_, name)
+
+
+class PipelineCache:
+    """
+    模型管道中预处理步骤的缓存
+
+    作为Pipeline的memory参数，同一折的训练数据上各个候选共用一次预处理的结果（如MinMaxScaler），
+    不必每个候选都重新拟合。缓存用joblib.Memory存放在磁盘上，并行搜索的各个进程共用；
+    用完后超过bytes_limit的部分按最久未使用的顺序删除，没有指定目录时使用临时目录，用完即删。
+
+        with PipelineCache() as memory:
+            pipe.set_params(memory=memory)
+            gsCV.fit(X, y)
+    """
+
+    def __init__(self, location: str = None, bytes_limit=1 << 30, verbose: int = 0):
+        """
+        Args:
+            location: 缓存目录，为空时使用临时目录
+            bytes_limit: 缓存大小上限，字节数或'500M'这样的字符串
+            verbose: joblib.Memory的日志级别
+        """
+        self.temporary = location is None
+        self.location = tempfile.mkdtemp(prefix='mlsr_pipeline_') if location is None else location
+        self.bytes_limit = bytes_limit
+        self.memory = Memory(self.location, verbose=verbose)
+
+    def reduce_size(self):
+        """
+        把缓存删减到bytes_limit以内
+        """
+        try:
+            self.memory.reduce_size(bytes_limit=self.bytes_limit)
+        except TypeError:
+            # joblib 1.3之前reduce_size没有参数，上限是Memory的属性
+            self.memory.bytes_limit = self.bytes_limit
+            self.memory.reduce_size()
+
+    def close(self):
+        if self.temporary:
+            shutil.rmtree(self.location, ignore_errors=True)
+        else:
+            self.reduce_size()
+
+    def __enter__(self) -> Memory:
+        return self.memory
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pipeline_cache(cache) -> PipelineCache:
+    """
+    由grid_search_and_result的cache参数得到PipelineCache
+
+    Args:
+        cache: None或False不缓存，True使用临时目录，字符串为缓存目录，也可以直接给出PipelineCache
+
+    Returns: PipelineCache，不缓存时返回None
+
+    """
+    if cache is None or cache is False:
+        return None
+    if isinstance(cache, PipelineCache):
+        return cache
+    return PipelineCache(None if cache is True else cache)
+
+
+def run_search(
+        pipe: Pipeline,
+        grid: dict,
+        Xtrain: np.ndarray,
+        ytrain: np.ndarray,
+        scoring,
+        refit: str = 'f1',
+        k: int = 5,
+        verbose: int = 2,
+        n_jobs: int = -1,
+        search: str = 'grid',
+        search_params: dict = None,
+        cache=None,
+        fit_params: dict = None,
+        threads: int = None):
+    """
+    构造并训练搜索模型
+
+    两层并行共用一份核数预算：外层交叉验证用n_jobs个进程，每个进程中BLAS、OpenMP等线程库用threads个线程，
+    总的线程数不超过n_jobs * threads，不会因为两层并行相乘而超额占用CPU。
+    交叉验证串行时管道中模型自身的n_jobs也改为threads；交叉验证并行时改为1，
+    否则最后在当前进程中重新训练最佳模型时，模型内部的joblib会按外层的设置启动进程。
+
+    Args:
+        pipe: 模型管道
+        grid: 超参数搜索空间
+        Xtrain: 训练集特征
+        ytrain: 训练集标签
+        scoring: 评分指标
+        refit: 最后用来选择并重新训练最佳模型的指标
+        k: 交叉验证折数
+        verbose: 日志级别，0为静默
+        n_jobs: 交叉验证并行的进程数
+        search: 搜索策略，见make_search
+        search_params: 搜索策略的其他参数
+        cache: 预处理步骤的缓存，见pipeline_cache
+        fit_params: 训练时参数
+        threads: 每个进程的线程数，默认为CPU数除以n_jobs
+
+    Returns: 训练好的搜索模型
+
+    """
+    outer = effective_n_jobs(n_jobs)
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // outer)
+    inner = threads if outer == 1 else 1
+    pipe.set_params(**{name: inner for name in pipe.get_params() if name.endswith('__n_jobs')})
+    memory = pipeline_cache(cache)
+    if memory is not None:
+        pipe.set_params(memory=memory.memory)
+    model = make_search(pipe, grid, scoring, refit, k, verbose, n_jobs, search, search_params,
+                        n_classes=len(np.unique(ytrain)))
+    try:
+        # threadpool_limits限制当前进程（串行的交叉验证和最后的重新训练），inner_max_num_threads限制loky的各个进程
+        backend = parallel_backend('loky', inner_max_num_threads=threads) if outer != 1 else nullcontext()
+        with threadpool_limits(limits=threads), backend:
+            model.fit(Xtrain, ytrain, **(fit_params or {}))
+    finally:
+        # 传入的PipelineCache留给调用者继续使用，只删减到大小上限
+        if isinstance(cache, PipelineCache):
+            memory.reduce_size()
+        elif memory is not None:
+            memory.close()
+        # 保存的搜索模型和最佳模型不能再指向缓存目录，临时目录已经删掉了
+        if memory is not None:
+            pipe.set_params(memory=None)
+            if hasattr(model, 'best_estimator_'):
+                model.best_estimator_.set_params(memory=None)
+    return model
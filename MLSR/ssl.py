@@ -1,14 +1,11 @@
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 # from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import f1_score, accuracy_score
-from sklearn.metrics import confusion_matrix
-from joblib import dump, load
 import numpy as np
-from time import strftime, localtime
 from .data import DataSet
-from .plot import plot_confusion_matrix
+from .search import run_search
+from .evaluate import report_search
 
 
 def grid_search_and_result_ssl(
@@ -21,9 +18,15 @@ def grid_search_and_result_ssl(
         log_dir: str,
         score=None,
         verbose: int = 2,
-        k: int = 5):
+        k: int = 5,
+        search: str = 'grid',
+        search_params: dict = None,
+        cache=None,
+        n_jobs: int = -1,
+        threads: int = None,
+        features: list = None):
     """
-    交叉验证网格搜索，测试集和训练集得分，混淆矩阵和ROC曲线绘制
+    交叉验证网格搜索，测试集和训练集得分和混淆矩阵，见evaluate.report_search
 
     Args:
         Xtrain: 训练集特征
@@ -36,53 +39,33 @@ def grid_search_and_result_ssl(
         score: 评分指标，默认使用f1和acc，最后用f1 refit
         verbose: 日志级别，0为静默
         k: 交叉验证折数
+        search: 搜索策略，'grid'为穷举，'halving'为逐次减半，'racing'为先用前几折淘汰，见search.make_search
+        search_params: 搜索策略的其他参数
+        cache: 预处理步骤的缓存，True使用临时目录，字符串为缓存目录，也可以给出search.PipelineCache，默认不缓存
+        n_jobs: 交叉验证并行的进程数
+        threads: 每个进程中模型自身和BLAS等线程库的线程数，见search.run_search
+        features: 训练特征的中文名，记在搜索模型和最佳模型的training_features_属性上，
+            之后可以直接用模型指定要生成的特征，见data.resolve_features
 
-    Returns: 训练好的GridSearchCV模型
+    Returns: 训练好的搜索模型
 
     """
-    file_prefix = log_dir + '/' + strftime("%Y_%m_%d_%H_%M_%S", localtime())
-    file = open(file_prefix + '.log.txt', 'x')
     scoring = score
     if scoring is None:
         scoring = {
             'f1': 'f1_macro',
             'accuracy': 'accuracy'
         }
-    gsCV = GridSearchCV(
-        estimator=pipe,
-        cv=k, n_jobs=-1, param_grid=grid,
-        scoring=scoring,
-        refit='f1',
-        verbose=verbose
-    )
-    gsCV.fit(Xtrain, ytrain)
-    dump(gsCV, log_dir + '/gsCV')
-    dump(gsCV.best_estimator_, log_dir + '/best_model')
-    if verbose > 2:
-        file.write(gsCV.cv_results_.__str__())
-    if verbose:
-        file.write(gsCV.get_params().__str__())
-        file.write('\nBest score on training set by grid search cross validation: {}\n'
-                   .format(gsCV.score(Xtrain, ytrain)))
-    best_model = load(log_dir + '/best_model')
-    test_prediction = best_model.predict(Xtest)
-    file.write('Accuracy on test set: {}\n'.format(accuracy_score(ytest, test_prediction)))
-    file.write('F1-score on test set: {}\n'.format(f1_score(ytest, test_prediction, average='macro')))
-    if verbose:
-        cm = confusion_matrix(ytrain, best_model.predict(Xtrain))
-        plot_confusion_matrix(cm, ['无标签', '0', '1'], file_prefix + '_train_cm.png')
-        file.write('\ntrain_cm:\n')
-        file.write(cm.__str__())
-        cm = confusion_matrix(ytest, test_prediction)
-        plot_confusion_matrix(cm, ['0', '1'], file_prefix + '_test_cm.png')
-        file.write('\ntest_cm:\n')
-        file.write(cm.__str__())
-    #         plot_roc(best_model, Xtest, ytest, file_prefix + '_roc.png')
-    file.close()
+    gsCV = run_search(pipe, grid, Xtrain, ytrain, scoring, 'f1', k, verbose, n_jobs, search, search_params, cache,
+                      None, threads)
+    if features is not None:
+        gsCV.training_features_ = gsCV.best_estimator_.training_features_ = list(features)
+    report_search(gsCV, log_dir, Xtrain, ytrain, Xtest, ytest, ['无标签', '0', '1'], ['0', '1'], verbose)
     return gsCV
 
 
-def do_tsvm(data: DataSet, log_dir: str = '../log', grid: dict = None):
+def do_tsvm(data: DataSet, log_dir: str = '../log', grid: dict = None, search: str = 'grid',
+            search_params: dict = None, cache=None, n_jobs: int = -1, threads: int = None):
     """
     Transductive Support Vector Machine
 
@@ -90,8 +73,13 @@ def do_tsvm(data: DataSet, log_dir: str = '../log', grid: dict = None):
         data: 输入数据DataSet对象
         grid:超参数搜索空间的网格，不填则使用默认搜索空间
         log_dir:输出结果文件的目录
+        search:搜索策略，见search.make_search
+        search_params:搜索策略的其他参数
+        cache:预处理步骤的缓存，见grid_search_and_result
+        n_jobs:交叉验证并行的进程数
+        threads:每个进程的线程数，见grid_search_and_result
 
-    Returns:返回训练好的GridSearchCV模型
+    Returns:返回训练好的搜索模型
 
     """
     from .tsvm import TSVM
@@ -105,13 +93,12 @@ def do_tsvm(data: DataSet, log_dir: str = '../log', grid: dict = None):
         ('scaler', MinMaxScaler()),
         ('tsvm', TSVM())
     ])
-    index = data.strong_label[data.strong_label != -1].index
-    strong_features = data.features.take(index)
-    strong_label = data.strong_label.take(index)
-    index = data.strong_label[data.strong_label == -1].index
-    unlabeled_features = data.features.take(index)
-    unlabeled_strong_label = data.strong_label.take(index)
-    Xtrain, Xtest, ytrain, ytest = train_test_split(strong_features, strong_label, train_size=0.4)
-    Xtrain = np.concatenate((Xtrain, unlabeled_features.values), axis=0)
-    ytrain = np.concatenate((ytrain, unlabeled_strong_label.values), axis=0)
-    return grid_search_and_result_ssl(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir)
+    X = data.matrix()
+    y = data.strong_label.to_numpy()
+    labeled = y != -1
+    Xtrain, Xtest, ytrain, ytest = train_test_split(X[labeled], y[labeled], train_size=0.4)
+    Xtrain = np.concatenate((Xtrain, X[~labeled]), axis=0)
+    ytrain = np.concatenate((ytrain, y[~labeled]), axis=0)
+    return grid_search_and_result_ssl(Xtrain, ytrain, Xtest, ytest, pipe, grid, log_dir,
+                                      search=search, search_params=search_params, cache=cache, n_jobs=n_jobs,
+                                      threads=threads, features=list(data.features_name.values()))
@@ -0,0 +1,357 @@
+import os
+import json
+import shutil
+import tempfile
+from hashlib import sha256
+import numpy as np
+import pandas as pd
+from .tokenizer import dictionary_signature
+
+LABEL = '__label__'
+STRONG_LABEL = '__strong_label__'
+
+
+class ColumnStore:
+    """
+    按列存放在磁盘上的特征矩阵
+
+    目录下每一列一个二进制文件（列名.bin），另有meta.json记录列的顺序、类型、行数和features_name。
+    数据可以一块一块地追加，读取时用numpy.memmap映射，不需要整块读进内存。
+    """
+
+    META = 'meta.json'
+
+    def __init__(self, path: str):
+        """
+        打开一个列存储目录，目录不存在则新建
+
+        Args:
+            path: 存储目录
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_file = os.path.join(path, self.META)
+        if os.path.exists(meta_file):
+            with open(meta_file, encoding='utf-8') as f:
+                meta = json.load(f)
+        else:
+            meta = {'columns': [], 'dtypes': {}, 'rows': 0, 'features_name': {}}
+        self.columns = meta['columns']
+        self.dtypes = {k: np.dtype(v) for k, v in meta['dtypes'].items()}
+        self.rows = meta['rows']
+        self.features_name = meta['features_name']
+
+    def __len__(self):
+        return self.rows
+
+    def _file(self, column: str) -> str:
+        return os.path.join(self.path, column + '.bin')
+
+    def _write_meta(self):
+        meta = {
+            'columns': self.columns,
+            'dtypes': {k: v.str for k, v in self.dtypes.items()},
+            'rows': self.rows,
+            'features_name': self.features_name
+        }
+        with open(os.path.join(self.path, self.META), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @staticmethod
+    def _store_dtype(dtype) -> np.dtype:
+        # 布尔、无符号整数和浮点数按原类型存（见data.FEATURE_DTYPES）；
+        # 其余数值特征各块之间可能有int也有float（如有缺失值），统一存为float64
+        dtype = np.dtype(dtype)
+        return dtype if dtype.kind in 'buf' else np.dtype('float64')
+
+    def clear(self):
+        """
+        删除已有的全部数据，之后的append重新确定列和类型
+        """
+        for c in list(self.dtypes):
+            if os.path.exists(self._file(c)):
+                os.remove(self._file(c))
+        self.columns, self.dtypes, self.rows, self.features_name = [], {}, 0, {}
+        self._write_meta()
+
+    def append(self, features: pd.DataFrame, label: pd.Series, strong_label: pd.Series, features_name: dict = None):
+        """
+        在尾部追加一块数据，第一次追加时确定列和类型
+
+        Args:
+            features: 生成好的特征
+            label: 弱标签
+            strong_label: 强标签
+            features_name: 特征名映射，第一次追加时记录
+
+        """
+        if not self.columns:
+            self.columns = [str(c) for c in features.columns]
+            self.dtypes = {c: self._store_dtype(features[c].dtype) for c in self.columns}
+            self.dtypes[LABEL] = self.dtypes[STRONG_LABEL] = np.dtype('int64')
+            self.features_name = dict(features_name or {})
+        elif [str(c) for c in features.columns] != self.columns:
+            raise ValueError('columns do not match the store: {}'.format(list(features.columns)))
+        data = {c: features[c] for c in self.columns}
+        data[LABEL] = label
+        data[STRONG_LABEL] = strong_label
+        for c, v in data.items():
+            with open(self._file(c), 'ab') as f:
+                np.asarray(v, dtype=self.dtypes[c]).tofile(f)
+        self.rows += len(features)
+        self._write_meta()
+
+    def column(self, name: str, mmap: bool = True) -> np.ndarray:
+        """
+        读取一列
+
+        Args:
+            name: 列名
+            mmap: 为True时返回只读的numpy.memmap，否则读入内存
+
+        Returns: numpy.ndarray
+
+        """
+        dtype = self.dtypes[name]
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        if mmap:
+            return np.memmap(self._file(name), dtype=dtype, mode='r', shape=(self.rows,))
+        return np.fromfile(self._file(name), dtype=dtype, count=self.rows)
+
+    def read(self, mmap: bool = True) -> tuple:
+        """
+        读取整个存储
+
+        Args:
+            mmap: 是否用memmap读取各列
+
+        Returns: (features, label, strong_label, features_name)
+
+        """
+        # copy=False时每一列单独存放，不会合并成同类型的二维数组，memmap的列不会被整块读入内存
+        features = pd.DataFrame({c: self.column(c, mmap) for c in self.columns}, columns=self.columns, copy=False)
+        label = pd.Series(self.column(LABEL, mmap), copy=False)
+        strong_label = pd.Series(self.column(STRONG_LABEL, mmap), copy=False)
+        return features, label, strong_label, dict(self.features_name)
+
+
+def save_store(path: str, features: pd.DataFrame, label: pd.Series, strong_label: pd.Series,
+               features_name: dict):
+    """
+    把一个数据集整体写成ColumnStore目录，已有的目录会被替换。
+    先写到同一目录下的临时目录再改名，中途失败不会留下不完整的数据
+
+    Args:
+        path: 存储目录
+        features: 特征
+        label: 弱标签
+        strong_label: 强标签
+        features_name: 特征名映射
+
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    try:
+        ColumnStore(tmp).append(features, label, strong_label, features_name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class ColumnBuffer:
+    """
+    内存中可增长的按列缓冲区
+
+    每列预先分配一段numpy数组，空间不够时容量翻倍，追加n行的均摊代价只与n有关，
+    不像pd.concat那样每次都复制已有的全部数据。label和strong_label与特征列一起存放。
+    """
+
+    def __init__(self, columns: list, dtypes: dict, capacity: int = 1024):
+        """
+        Args:
+            columns: 特征列名，按顺序
+            dtypes: {列名: numpy类型}，须包含LABEL和STRONG_LABEL
+            capacity: 初始容量（行数）
+        """
+        self.columns = list(columns)
+        self.rows = 0
+        self._data = {c: np.empty(capacity, dtype=dtypes[c]) for c in self.columns + [LABEL, STRONG_LABEL]}
+
+    def __len__(self):
+        return self.rows
+
+    @staticmethod
+    def _dtype(v) -> np.dtype:
+        # category等扩展类型按object存
+        return v.dtype if isinstance(v.dtype, np.dtype) else np.dtype(object)
+
+    @classmethod
+    def concat(cls, parts: list):
+        """
+        一次分配好空间，把多块数据依次拷进去
+
+        Args:
+            parts: [(features, label, strong_label), ...]，各块的列须相同，按列名对齐
+
+        Returns: ColumnBuffer
+
+        """
+        features = parts[0][0]
+        dtypes = {}
+        for c in features.columns:
+            dtypes[c] = np.result_type(*[cls._dtype(f[c]) for f, _, _ in parts])
+        dtypes[LABEL] = np.result_type(*[cls._dtype(y) for _, y, _ in parts])
+        dtypes[STRONG_LABEL] = np.result_type(*[cls._dtype(y) for _, _, y in parts])
+        buf = cls(features.columns, dtypes, capacity=sum(len(f) for f, _, _ in parts))
+        for part in parts:
+            buf.extend(*part)
+        return buf
+
+    def _reserve(self, rows: int):
+        capacity = len(self._data[LABEL])
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity)
+        for c, v in self._data.items():
+            grown = np.empty(capacity, dtype=v.dtype)
+            grown[:self.rows] = v[:self.rows]
+            self._data[c] = grown
+
+    def _put(self, c: str, v, start: int, stop: int):
+        v = np.asarray(v, dtype=self._dtype(v))
+        if not np.can_cast(v.dtype, self._data[c].dtype, 'safe'):
+            # 新数据的类型更宽（如出现缺失值的整数列），该列整体提升类型
+            self._data[c] = self._data[c].astype(np.result_type(v.dtype, self._data[c].dtype))
+        self._data[c][start:stop] = v
+
+    def extend(self, features: pd.DataFrame, label: pd.Series, strong_label: pd.Series):
+        """
+        在尾部追加一块数据
+
+        Args:
+            features: 特征，列须与缓冲区相同，按列名对齐
+            label: 弱标签
+            strong_label: 强标签
+
+        """
+        if len(features.columns) != len(self.columns) or set(features.columns) != set(self.columns):
+            raise ValueError('columns do not match the buffer: {}'.format(list(features.columns)))
+        n = len(features)
+        self._reserve(self.rows + n)
+        start, stop = self.rows, self.rows + n
+        for c in self.columns:
+            self._put(c, features[c], start, stop)
+        self._put(LABEL, label, start, stop)
+        self._put(STRONG_LABEL, strong_label, start, stop)
+        self.rows = stop
+
+    def frames(self) -> tuple:
+        """
+        把已有的数据转成pandas对象
+
+        Returns: (features, label, strong_label)
+
+        """
+        n = self.rows
+        features = pd.DataFrame({c: self._data[c][:n] for c in self.columns}, columns=self.columns)
+        return features, pd.Series(self._data[LABEL][:n].copy()), pd.Series(self._data[STRONG_LABEL][:n].copy())
+
+
+# 特征提取相关的源文件，任何一个改动都会使特征缓存失效
+_FEATURE_SOURCES = ['data.py', 'keywords.py', 'matcher.py', 'tokenizer.py']
+
+
+def feature_version() -> str:
+    """
+    特征提取代码、关键字表和分词词典的版本签名，jieba升级后分词结果可能不同，缓存也随之失效
+
+    Returns: str
+
+    """
+    h = sha256(dictionary_signature().encode('utf-8'))
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _FEATURE_SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def file_digest(filename: str) -> str:
+    """
+    文件内容的sha256
+
+    Args:
+        filename: 文件路径
+
+    Returns: str
+
+    """
+    h = sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    按内容寻址的特征缓存
+
+    键为原始文件内容的哈希加上特征提取代码的版本签名，值为一个ColumnStore目录，
+    原始文件或特征提取代码没变时直接读取生成好的特征，不用重新分词。
+    """
+
+    def __init__(self, cache_dir: str = 'data/.feature_cache'):
+        """
+        Args:
+            cache_dir: 缓存目录
+        """
+        self.cache_dir = cache_dir
+
+    def key(self, filename: str, **kwargs) -> str:
+        """
+        缓存键
+
+        Args:
+            filename: 原始文件路径
+            **kwargs: 其他影响特征结果的参数（如文件编码）
+
+        Returns: str
+
+        """
+        extra = sha256(repr(sorted(kwargs.items())).encode('utf-8')).hexdigest()[:8]
+        return '{}_{}_{}'.format(file_digest(filename)[:32], feature_version(), extra)
+
+    def get(self, key: str):
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns: 命中时返回(features, label, strong_label, features_name)，否则返回None
+
+        """
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.exists(os.path.join(path, ColumnStore.META)):
+            return None
+        return ColumnStore(path).read(mmap=False)
+
+    def put(self, key: str, features: pd.DataFrame, label: pd.Series, strong_label: pd.Series,
+            features_name: dict):
+        """
+        写入缓存，先写到临时目录再改名，中途失败不会留下不完整的缓存
+
+        Args:
+            key: 缓存键
+            features: 生成好的特征
+            label: 弱标签
+            strong_label: 强标签
+            features_name: 特征名映射
+
+        """
+        save_store(os.path.join(self.cache_dir, key), features, label, strong_label, features_name)
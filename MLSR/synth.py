@@ -0,0 +1,196 @@
+"""
+生成与原始数据格式相同的模拟数据（GBK编码的csv），用于测试特征提取的速度
+
+    python -m MLSR.synth -n 1000000 -o data/synth_1m.csv --seed 0
+"""
+import argparse as arg
+import numpy as np
+import pandas as pd
+from .keywords import POLICY_KEYWORDS, INCOME_KEYWORDS, INCOME_EXACT, SCHOLARSHIP_AMOUNTS
+from .keywords import EDUCATION_KEYWORDS, EDUCATION_ZERO_CONTAINS, EDUCATION_ZERO_EXACT
+from .keywords import ACCIDENT_KEYWORDS, ACCIDENT_ZERO, DISASTER_KEYWORDS
+
+# 与DataSet读入的原始数据相同的列，专家判定等级只在有强标签的数据中出现
+RAW_LAYOUT = [
+    '院系', '专业', '民族', '出生年月', '享受国家政策资助情况', '入学前户口性质', '家庭主要经济来源',
+    '家庭人口', '家庭人均年收入', '家庭其他成员在受教育情况', '突发事件情况', '是否贷款',
+    '在校受奖励资助情况', '院系认定贫困类型', '所在校区', '备注'
+]
+
+_EDU = {tag: sorted(words) for tag, words in EDUCATION_KEYWORDS}
+_ACC = {tag: sorted(words) for tag, words in ACCIDENT_KEYWORDS}
+_SEPARATORS = ['，', '、', ' ', '；']
+
+
+def _pick(rng: np.random.Generator, words):
+    return words[rng.integers(len(words))]
+
+
+def _education(rng: np.random.Generator) -> str:
+    r = rng.random()
+    if r < 0.2:
+        return _pick(rng, EDUCATION_ZERO_CONTAINS + EDUCATION_ZERO_EXACT + ('无',))
+    clauses = []
+    for _ in range(rng.integers(1, 4)):
+        member = _pick(rng, _EDU['member'] + _EDU['sp_member'])
+        level = _pick(rng, _EDU[_pick(rng, [
+            'college', 'sp_college', 'gr_college', 'high_school', 'gr_high_school', 'compulsory', 'gr_compulsory',
+            'others', 'grad'
+        ])])
+        clause = member + _pick(rng, ['', '在读', '读', '正在上']) + level
+        if rng.random() < 0.15:
+            clause = _pick(rng, _EDU[_pick(rng, ['number1', 'number2', 'number3'])]) + clause
+        clauses.append(clause)
+    return _pick(rng, _SEPARATORS).join(clauses)
+
+
+def _accident(rng: np.random.Generator) -> str:
+    r = rng.random()
+    if r < 0.35:
+        return _pick(rng, ACCIDENT_ZERO)
+    clauses = []
+    for _ in range(rng.integers(1, 3)):
+        person = _pick(rng, [_ACC['dad'], _ACC['mom'], ['父母', '父亲母亲'], _ACC['grand_parents'],
+                             _ACC['siblings'], _ACC['sp_siblings'], _ACC['invalid_member']])
+        event = _ACC[_pick(rng, ['illness', 'illness', 'serious_illness', 'unemployed', 'dead'])]
+        clauses.append(_pick(rng, person) + _pick(rng, ['', '患', '因', '常年']) + _pick(rng, event))
+    if rng.random() < 0.1:
+        clauses.append(_pick(rng, ['父母', '父亲', '母亲']) + _pick(rng, _ACC['divorce']))
+    if rng.random() < 0.08:
+        clauses.append(_pick(rng, ['家中遭遇', '去年', '']) + _pick(rng, DISASTER_KEYWORDS))
+    return _pick(rng, _SEPARATORS).join(clauses)
+
+
+def _income(rng: np.random.Generator) -> str:
+    if rng.random() < 0.2:
+        return _pick(rng, _pick(rng, list(INCOME_EXACT.values())))
+    words = [_pick(rng, _pick(rng, list(INCOME_KEYWORDS.values()))) for _ in range(rng.integers(1, 3))]
+    return _pick(rng, _SEPARATORS).join(words)
+
+
+def _scholarship(rng: np.random.Generator) -> str:
+    if rng.random() < 0.5:
+        return '无'
+    names = list(SCHOLARSHIP_AMOUNTS)
+    items = [_pick(rng, names) + '助学金' for _ in range(rng.integers(0, 3))]
+    if rng.random() < 0.6:
+        items.append(_pick(rng, ['2016年', '2017年', '']) + _pick(rng, ['国家一等助学金', '国家二等助学金', '国助']))
+    return _pick(rng, _SEPARATORS).join(items) or '无'
+
+
+def _policy(rng: np.random.Generator) -> str:
+    if rng.random() < 0.6:
+        return '无'
+    return _pick(rng, list(POLICY_KEYWORDS)[:-1] + ['军烈属', '低保', '建档立卡'])
+
+
+# 各自由文本列的生成函数
+_TEXT_COLUMNS = {
+    '享受国家政策资助情况': _policy,
+    '家庭主要经济来源': _income,
+    '家庭其他成员在受教育情况': _education,
+    '突发事件情况': _accident,
+    '在校受奖励资助情况': _scholarship,
+}
+# 取值种类很少的列：(取值, 概率)
+_CHOICE_COLUMNS = {
+    '民族': (['汉', '汉族', '回族', '满族', '蒙古族', '壮族'], [0.55, 0.3, 0.05, 0.04, 0.03, 0.03]),
+    '入学前户口性质': (['农村', '农业', '城镇', '非农业'], [0.4, 0.3, 0.2, 0.1]),
+    '家庭人口': (['2', '3', '4', '5', '6', '7', '四口', '五人', '三口'], [.05, .3, .3, .15, .06, .02, .05, .04, .03]),
+    '是否贷款': (['是', '否', '无', '生源地贷款', '√', '-'], [0.35, 0.35, 0.1, 0.1, 0.05, 0.05]),
+    '院系认定贫困类型': (['特别困难', '一般困难'], [0.4, 0.6]),
+}
+
+
+def _pool(rng: np.random.Generator, func, size: int) -> tuple:
+    """
+    预先生成一批不同的文本，再按近似Zipf分布抽样，与真实数据中大量重复的情况接近
+
+    Returns: (文本数组, 抽样概率)
+
+    """
+    values = np.array([func(rng) for _ in range(size)], dtype=object)
+    p = 1. / np.arange(1, size + 1)
+    return values, p / p.sum()
+
+
+class RawGenerator:
+    """
+    模拟原始数据生成器
+
+    各自由文本列由keywords中特征提取所用的关键字拼成，先生成固定大小的文本池，
+    之后每批数据都从池中向量化抽样，生成速度与文本的复杂程度无关。
+    """
+
+    def __init__(self, seed=None, pool_size: int = 20000, strong: bool = False):
+        """
+        Args:
+            seed: 随机数种子
+            pool_size: 每个自由文本列的文本池大小（不同文本的个数）
+            strong: 是否生成专家判定等级（强标签）
+        """
+        self.rng = np.random.default_rng(seed)
+        self.strong = strong
+        self._pools = {c: _pool(self.rng, f, pool_size) for c, f in _TEXT_COLUMNS.items()}
+        self._rows = 0
+
+    def batch(self, n: int) -> pd.DataFrame:
+        """
+        生成n行数据，索引接着上一批编号
+
+        Args:
+            n: 行数
+
+        Returns: pandas.DataFrame，列与原始数据相同
+
+        """
+        rng = self.rng
+        d = {}
+        for c in RAW_LAYOUT:
+            if c in self._pools:
+                values, p = self._pools[c]
+                d[c] = values[rng.choice(len(values), n, p=p)]
+            elif c in _CHOICE_COLUMNS:
+                values, p = _CHOICE_COLUMNS[c]
+                d[c] = np.array(values, dtype=object)[rng.choice(len(values), n, p=p)]
+            elif c == '家庭人均年收入':
+                d[c] = rng.lognormal(8.9, 0.6, n).astype('int64')
+            elif c == '备注':
+                d[c] = np.full(n, np.nan)
+            else:
+                d[c] = np.full(n, 'xxx', dtype=object)
+        if self.strong:
+            d['专家判定等级'] = rng.integers(1, 5, n)
+        f = pd.DataFrame(d, index=pd.RangeIndex(self._rows, self._rows + n))
+        self._rows += n
+        return f
+
+    def to_csv(self, filename: str, n: int, batch_size: int = 100000, encoding: str = 'gbk'):
+        """
+        分批生成n行数据写入csv
+
+        Args:
+            filename: 输出文件路径
+            n: 总行数
+            batch_size: 每批的行数
+            encoding: 文件编码
+
+        """
+        for start in range(0, n, batch_size):
+            self.batch(min(batch_size, n - start)).to_csv(
+                filename, encoding=encoding, mode='w' if start == 0 else 'a', header=start == 0)
+
+
+def get_arguments():
+    parser = arg.ArgumentParser(description='Generate synthetic raw applicant data')
+    parser.add_argument('-n', '--rows', type=int, default=1000, help='Number of rows')
+    parser.add_argument('-o', '--output', default='data/synth.csv', help='Output csv path')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--strong', action='store_true', help='Also generate expert labels')
+    parser.add_argument('--batch-size', type=int, default=100000, dest='batch_size')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_arguments()
+    RawGenerator(args.seed, strong=args.strong).to_csv(args.output, args.rows, args.batch_size)
@@ -0,0 +1,366 @@
+import os
+import json
+import shelve
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from hashlib import md5
+import numpy as np
+import jieba
+from jieba import finalseg
+from joblib.externals.loky import get_reusable_executor
+from .keywords import EDUCATION_SUGGEST_WORD, EDUCATION_SUGGEST_SPLIT
+from .keywords import ACCIDENT_SUGGEST_WORD, ACCIDENT_SUGGEST_SPLIT
+
+# 按do_education、do_accident原来的调用顺序排列的词频调整，'w'按tuple(word)调整，'s'为强制切分
+_SUGGESTIONS = [('w', w) for w in EDUCATION_SUGGEST_WORD] + [('s', x) for x in EDUCATION_SUGGEST_SPLIT] + \
+               [('w', w) for w in ACCIDENT_SUGGEST_WORD] + [('s', x) for x in ACCIDENT_SUGGEST_SPLIT]
+
+
+def dictionary_signature() -> str:
+    """
+    词典的版本签名，jieba版本或词频调整变化时签名随之变化
+
+    Returns: str
+
+    """
+    return md5(repr((jieba.__version__, _SUGGESTIONS)).encode('utf-8')).hexdigest()[:16]
+
+
+def build_dictionary(path: str):
+    """
+    在jieba默认词典上做好所有词频调整，存为sqlite格式的词典缓存文件
+
+    Args:
+        path: 词典缓存文件路径
+
+    """
+    tk = jieba.Tokenizer()
+    tk.initialize()
+    force_split = []
+    for kind, x in _SUGGESTIONS:
+        if tk.suggest_freq(tuple(x) if kind == 'w' else x, True) == 0:
+            force_split.append(''.join(x))
+    # 先写到临时文件再替换，多个进程同时生成时不会读到写了一半的文件
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    con = sqlite3.connect(tmp)
+    con.execute('CREATE TABLE freq (word TEXT PRIMARY KEY, freq INTEGER) WITHOUT ROWID')
+    con.executemany('INSERT INTO freq VALUES (?, ?)', tk.FREQ.items())
+    con.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    con.executemany('INSERT INTO meta VALUES (?, ?)', [
+        ('total', str(tk.total)), ('force_split', json.dumps(force_split, ensure_ascii=False))
+    ])
+    con.commit()
+    con.close()
+    os.replace(tmp, path)
+
+
+class _LazyFreq:
+    """
+    按需从词典缓存文件中查词频，查过的词留在内存里，供只处理少量数据时使用
+    """
+
+    def __init__(self, con: sqlite3.Connection):
+        self._con = con
+        self._memo = {}
+
+    def get(self, word, default=None):
+        try:
+            v = self._memo[word]
+        except KeyError:
+            row = self._con.execute('SELECT freq FROM freq WHERE word = ?', (word,)).fetchone()
+            v = self._memo[word] = row[0] if row else None
+        return default if v is None else v
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __getitem__(self, word):
+        v = self.get(word)
+        if v is None:
+            raise KeyError(word)
+        return v
+
+
+class CachedTokenizer:
+    """
+    带缓存的jieba分词
+
+    使用独立的jieba.Tokenizer，词典只在第一次生成时做一遍词频调整，之后从词典缓存文件读取。
+    原始数据中大量字符串是重复的（“无”、“独生”、“父母健康”等），所以对每个字符串的分词结果做
+    LRU缓存，并且可以选择存到磁盘上，下次重新生成特征时直接读取。
+    磁盘缓存在sync或close时落盘，可以用with语句保证关闭：
+
+        with CachedTokenizer(cache_path='data/.tokens') as tokenizer:
+            d.generate_feature(tokenizer)
+
+    缓存的键是规范化之后的字符串（去掉首尾空白），磁盘缓存还会带上词典签名和HMM设置，
+    词典调整过之后旧的结果不会被误用。
+    """
+
+    def __init__(self, maxsize: int = 65536, cache_path: str = None, hmm: bool = True,
+                 lazy: bool = False, dict_path: str = None):
+        """
+        Args:
+            maxsize: 内存中最多缓存多少个字符串的分词结果
+            cache_path: 分词结果的磁盘缓存文件路径（shelve格式），不填则只在内存中缓存
+            hmm: 是否使用HMM发现新词
+            lazy: 为True时不把词典整个读进内存，按需查询，适合只处理一两条数据（如网页demo）；
+                批量处理时应为False
+            dict_path: 词典缓存文件路径，不填则放在系统临时目录下，文件名带词典签名
+        """
+        self.maxsize = maxsize
+        self.cache_path = cache_path
+        self.hmm = hmm
+        self.lazy = lazy
+        self.signature = dictionary_signature()
+        self.dict_path = dict_path or os.path.join(
+            tempfile.gettempdir(), 'mlsr_jieba_{}.sqlite'.format(self.signature))
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._store = shelve.open(cache_path) if cache_path else None
+        self._store_prefix = '{}:{:d}\0'.format(self.signature, hmm)
+        self._jieba = None
+
+    def load(self):
+        """
+        加载词典，词典缓存文件不存在时先生成。第一次分词时会自动调用
+
+        Returns: self
+
+        """
+        if self._jieba is not None:
+            return self
+        if not os.path.exists(self.dict_path):
+            build_dictionary(self.dict_path)
+        con = sqlite3.connect(self.dict_path, check_same_thread=False)
+        meta = dict(con.execute('SELECT key, value FROM meta'))
+        tk = jieba.Tokenizer()
+        if self.lazy:
+            tk.FREQ = _LazyFreq(con)
+        else:
+            tk.FREQ = dict(con.execute('SELECT word, freq FROM freq'))
+            con.close()
+        tk.total = int(meta['total'])
+        tk.initialized = True
+        for word in json.loads(meta['force_split']):
+            finalseg.add_force_split(word)
+        self._jieba = tk
+        return self
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        缓存键的规范化，首尾的空白不影响关键字之间的相对位置
+
+        Args:
+            text: 原始字符串
+
+        Returns: 规范化后的字符串
+
+        """
+        return text.strip()
+
+    def lookup(self, key: str):
+        """
+        在内存缓存和磁盘缓存中查找规范化后的字符串的分词结果
+
+        Args:
+            key: 规范化后的字符串，见normalize
+
+        Returns: 分词结果，没有缓存时返回None
+
+        """
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return tokens
+        store_key = self._store_prefix + key
+        if self._store is not None and store_key in self._store:
+            tokens = self._store[store_key]
+            self.hits += 1
+            self._remember(key, tokens)
+        return tokens
+
+    def remember(self, key: str, tokens: tuple):
+        """
+        记下在别处（如进程池中）分好的结果，同时写入内存缓存和磁盘缓存
+
+        Args:
+            key: 规范化后的字符串
+            tokens: 分词结果
+
+        """
+        self.misses += 1
+        if self._store is not None:
+            self._store[self._store_prefix + key] = tokens
+        self._remember(key, tokens)
+
+    def _remember(self, key: str, tokens: tuple):
+        self._cache[key] = tokens
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def config(self) -> dict:
+        """
+        在其他进程中构造分词结果相同的分词器所需的参数，磁盘缓存只由当前进程读写
+
+        Returns: dict，可直接传给CachedTokenizer
+
+        """
+        return {'maxsize': self.maxsize, 'hmm': self.hmm, 'dict_path': self.dict_path}
+
+    def cut(self, text: str) -> tuple:
+        """
+        分词，优先使用缓存
+
+        Args:
+            text: 待分词的字符串
+
+        Returns: 分词结果，tuple of str
+
+        """
+        key = self.normalize(text)
+        tokens = self.lookup(key)
+        if tokens is None:
+            tokens = tuple(self.load()._jieba.cut(key, cut_all=False, HMM=self.hmm))
+            self.remember(key, tokens)
+        return tokens
+
+    def cut_ids(self, texts, vocab: dict) -> tuple:
+        """
+        批量分词，每个词按vocab转成整数编号，不在vocab中的词为0，保留词的位置。
+        vocab是关键字到词性的映射而不是完整的词表：do_education、do_accident的pattern只区分关键字的词性，
+        其他词只起占位作用，全部记为0。
+        结果按CSR格式存放：第i个字符串的编号为ids[offsets[i]:offsets[i + 1]]
+
+        Args:
+            texts: 字符串序列
+            vocab: {词: 正整数编号}
+
+        Returns: (ids, offsets)，numpy.ndarray(int32)和长度为len(texts) + 1的numpy.ndarray(int64)
+
+        """
+        ids = []
+        offsets = [0]
+        get = vocab.get
+        for text in texts:
+            ids.extend([get(w, 0) for w in self.cut(text)])
+            offsets.append(len(ids))
+        return np.array(ids, dtype='int32'), np.array(offsets, dtype='int64')
+
+    def stats(self) -> dict:
+        """
+        缓存命中情况
+
+        Returns: dict，包括hits, misses, hit_rate和当前内存缓存大小
+
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.,
+            'size': len(self._cache)
+        }
+
+    def sync(self):
+        """
+        把磁盘缓存中新写入的结果落盘，进程意外退出时已分好的结果不会丢失
+        """
+        if self._store is not None:
+            self._store.sync()
+
+    def close(self):
+        """
+        关闭磁盘缓存
+        """
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_default_tokenizer = None
+
+
+def default_tokenizer() -> CachedTokenizer:
+    """
+    do_education和do_accident共用的分词器，只在内存中缓存
+
+    Returns: CachedTokenizer
+
+    """
+    global _default_tokenizer
+    if _default_tokenizer is None:
+        _default_tokenizer = CachedTokenizer()
+    return _default_tokenizer
+
+
+# 进程池中各进程的分词器，按参数区分
+_worker_tokenizers = {}
+
+
+def _cut_chunk(keys: list, config: dict) -> list:
+    key = tuple(sorted(config.items()))
+    if key not in _worker_tokenizers:
+        _worker_tokenizers[key] = CachedTokenizer(**config)
+    tokenizer = _worker_tokenizers[key]
+    return [tokenizer.cut(k) for k in keys]
+
+
+def segment(texts, vocab: dict, tokenizer: CachedTokenizer = None, n_jobs: int = 1, chunksize: int = 20000) -> tuple:
+    """
+    批量分词并转为整数编号，见CachedTokenizer.cut_ids。
+    n_jobs不为1时，先查tokenizer的缓存，只把没有缓存的不同字符串按chunksize分块交给进程池，
+    各进程按tokenizer的参数（词典、HMM）分词，结果再写回tokenizer的缓存。
+    进程池用joblib的可复用进程池，多次调用共用同一批进程，词典在每个进程中只加载一次
+
+    Args:
+        texts: 字符串序列
+        vocab: {词: 正整数编号}
+        tokenizer: 分词器，不填则使用共用的分词器
+        n_jobs: 进程数，1为串行，-1为使用所有CPU
+        chunksize: 并行时每块的字符串个数，没有缓存的字符串不多于这么多时直接串行
+
+    Returns: (ids, offsets)
+
+    """
+    tokenizer = tokenizer or default_tokenizer()
+    texts = list(texts)
+    if n_jobs == 1 or len(texts) <= chunksize:
+        return tokenizer.cut_ids(texts, vocab)
+    keys = [tokenizer.normalize(t) for t in texts]
+    tokens = {}
+    for k in dict.fromkeys(keys):
+        tokens[k] = tokenizer.lookup(k)
+    misses = [k for k, v in tokens.items() if v is None]
+    if len(misses) > chunksize:
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count()
+        pool = get_reusable_executor(max_workers=n_jobs)
+        chunks = [misses[i:i + chunksize] for i in range(0, len(misses), chunksize)]
+        config = tokenizer.config()
+        for chunk, part in zip(chunks, pool.map(_cut_chunk, chunks, [config] * len(chunks))):
+            for k, v in zip(chunk, part):
+                tokens[k] = v
+                tokenizer.remember(k, v)
+        tokenizer.sync()
+    else:
+        for k in misses:
+            tokens[k] = tokenizer.cut(k)
+    ids = []
+    offsets = [0]
+    get = vocab.get
+    for k in keys:
+        ids.extend([get(w, 0) for w in tokens[k]])
+        offsets.append(len(ids))
+    return np.array(ids, dtype='int32'), np.array(offsets, dtype='int64')
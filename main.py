@@ -1,6 +1,8 @@
 from MLSR.data import DataSet
 from MLSR.primary import *
 from MLSR.ssl import *
+from MLSR.search import SEARCH_STRATEGIES, PipelineCache
+from MLSR.schedule import run_tasks
 import logging
 import os
 import argparse as arg
@@ -18,63 +20,57 @@ def get_arguments():
     parser.add_argument('--lr', action='store_true', help='Train logistic regression')
     parser.add_argument('--xgb', action='store_true', help='Train xgboost')
     parser.add_argument('--tsvm', action='store_true', help='Train tsvm')
+    parser.add_argument('--search', default='grid', choices=SEARCH_STRATEGIES,
+                        help='Hyper-parameter search strategy: exhaustive grid, successive halving or racing')
+    parser.add_argument('--cache-dir', default=None, dest='cache_dir',
+                        help='Cache fitted preprocessing steps across grid candidates in this directory')
+    parser.add_argument('--cores', type=int, default=None,
+                        help='Total CPU budget shared by all searches (default: all cores)')
+    parser.add_argument('--concurrent', type=int, default=None,
+                        help='Maximum number of model searches running at the same time (default: all selected)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Threads per cross-validation process for the model and BLAS, taken from each search\'s '
+                             'share of --cores')
     return parser.parse_args()
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
     import warnings
     warnings.filterwarnings("ignore")
     args = get_arguments()
+    cache = PipelineCache(args.cache_dir) if args.cache_dir else None
     # load data
-    x = DataSet('data/rand_select_400_avg.csv')
-    x.generate_feature()
-    y = DataSet('data/not_selected_avg.csv')
-    y.generate_feature()
+    x = DataSet.cached('data/rand_select_400_avg.csv')
+    y = DataSet.cached('data/not_selected_avg.csv')
     fake = DataSet.data_augment()
     z = DataSet.static_merge(x, y)
     zz = DataSet.static_merge(z, fake)
-    if args.dt:
-        if not os.path.exists('log/dTree'):
-            os.makedirs('log/dTree')
-        do_decision_tree(zz, 'log/dTree')
-        logger.log('Decision Tree training complete, output in log/dTree')
-    if args.rf:
-        if not os.path.exists('log/rf'):
-            os.makedirs('log/rf')
-        do_random_forest(zz, 'log/rf')
-        logger.log('Random Forest complete, output in log/rf')
-    if args.nb:
-        if not os.path.exists('log/nb'):
-            os.makedirs('log/nb')
-        do_naive_bayes(zz, 'log/nb')
-        logger.log('Naive Bayes training complete, output in log/nb')
-    if args.svm:
-        if not os.path.exists('log/svm'):
-            os.makedirs('log/svm')
-        do_svm(zz, 'log/svm')
-        logger.log('SVM training complete, output in log/svm')
-    if args.lr:
-        if not os.path.exists('log/lr'):
-            os.makedirs('log/lr')
-        do_logistic(zz, 'log/lr')
-        logger.log('Logistic Regression training complete, output in log/lr')
-    if args.xgb:
-        if not os.path.exists('log/xgb'):
-            os.makedirs('log/xgb')
-        do_xgb(zz, 'log/xgb')
-        logger.log('XGBoost training complete, output in log/xgb')
     # create ssl dataset
     hard, soso = z.split_by_weak_label()
     hard.strong_label = hard.strong_label.map({-1: -1, 0: 0, 1: 1})
     soso.strong_label = soso.strong_label.map({-1: -1, 2: 0, 3: 1})
-    if args.tsvm:
-        if not os.path.exists('log/tsvm'):
-            os.makedirs('log/tsvm')
-        if not os.path.exists('log/tsvm/hard'):
-            os.makedirs('log/tsvm/hard')
-        if not os.path.exists('log/tsvm/soso'):
-            os.makedirs('log/tsvm/soso')
-        do_tsvm(hard, 'log/tsvm/hard')
-        do_tsvm(soso, 'log/tsvm/soso')
-        logger.log('Transductive SVM training complete, output in log/tvsm')
\ No newline at end of file
+    # (命令行参数, 任务名, 训练函数, 数据集, 输出目录)
+    models = [
+        (args.dt, 'Decision Tree', do_decision_tree, zz, 'log/dTree'),
+        (args.rf, 'Random Forest', do_random_forest, zz, 'log/rf'),
+        (args.nb, 'Naive Bayes', do_naive_bayes, zz, 'log/nb'),
+        (args.svm, 'SVM', do_svm, zz, 'log/svm'),
+        (args.lr, 'Logistic Regression', do_logistic, zz, 'log/lr'),
+        (args.xgb, 'XGBoost', do_xgb, zz, 'log/xgb'),
+        (args.tsvm, 'Transductive SVM (hard)', do_tsvm, hard, 'log/tsvm/hard'),
+        (args.tsvm, 'Transductive SVM (soso)', do_tsvm, soso, 'log/tsvm/soso'),
+    ]
+    tasks = {}
+    for selected, name, func, data, log_dir in models:
+        if selected:
+            if not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+            tasks[name] = (func, (data, log_dir), {'search': args.search, 'cache': cache})
+    # 各模型的搜索同时进行，总线程数不超过--cores
+    for name, result in run_tasks(tasks, args.cores, args.concurrent, args.threads).items():
+        if isinstance(result, Exception):
+            logger.error('%s training failed: %r', name, result)
+        else:
+            logger.info('%s training complete, output in %s', name, tasks[name][1][1])
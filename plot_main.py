@@ -1,10 +1,8 @@
 from MLSR.data import DataSet
 from MLSR.plot import *
 
-x = DataSet('data/rand_select_400_avg.csv')
-x.generate_feature()
-y = DataSet('data/not_selected_avg.csv')
-y.generate_feature()
+x = DataSet.cached('data/rand_select_400_avg.csv')
+y = DataSet.cached('data/not_selected_avg.csv')
 z = DataSet.static_merge(x, y)
 #plot_tsne(z, 'log/tsne.png')
 z = z.convert_to_ssl()
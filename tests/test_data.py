@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from MLSR.data import DataSet
+from MLSR.synth import RawGenerator
+from MLSR.tokenizer import CachedTokenizer
+
+
+def _dataset(n=6):
+    d = DataSet()
+    d.features = pd.DataFrame({'f0': np.arange(n, dtype='float64')}, index=np.arange(n) * 10)
+    d.label = pd.Series(np.arange(n) % 2, index=d.features.index)
+    d.strong_label = pd.Series(np.full(n, -1), index=d.features.index)
+    return d
+
+
+def test_take_from_reset_view_keeps_its_index():
+    view = _dataset().take([1, 3, 5], reset_index=True)
+    sub = view.take([0, 2], reset_index=False)
+    assert sub.features.index.tolist() == [0, 2]
+    assert sub.features['f0'].tolist() == [1.0, 5.0]
+    assert sub.label.index.tolist() == [0, 2]
+
+
+def test_take_from_view_keeps_parent_index():
+    view = _dataset().take([1, 3, 5], reset_index=False)
+    sub = view.take([0, 2], reset_index=False)
+    assert sub.features.index.tolist() == [10, 50]
+    assert sub.matrix()[:, 0].tolist() == [1.0, 5.0]
+
+
+def test_take_from_reset_view_reset():
+    view = _dataset().take([1, 3, 5], reset_index=True)
+    sub = view.take([2, 0], reset_index=True)
+    assert sub.features.index.tolist() == [0, 1]
+    assert sub.features['f0'].tolist() == [5.0, 1.0]
+
+
+def _raw_dataset(raw):
+    d = DataSet()
+    d._load_raw(raw.copy())
+    return d
+
+
+def test_parallel_generate_feature_matches_serial_with_custom_tokenizer(tmp_path):
+    raw = RawGenerator(seed=0, pool_size=2000).batch(3000)
+    serial = _raw_dataset(raw)
+    serial.generate_feature(CachedTokenizer(hmm=False))
+    tokenizer = CachedTokenizer(hmm=False, cache_path=str(tmp_path / 'cache'))
+    parallel = _raw_dataset(raw)
+    parallel.generate_feature(tokenizer, n_jobs=2, chunksize=300)
+    pd.testing.assert_frame_equal(parallel.features, serial.features)
+    assert parallel.features_name == serial.features_name
+    # 进程池中的分词结果写回了调用方的分词器
+    assert tokenizer.stats()['misses'] > 0
+    tokenizer.close()
@@ -0,0 +1,33 @@
+import pandas as pd
+from MLSR.data import DataSet, RAW_COLUMNS, read_raw, _rows
+from MLSR.synth import RawGenerator
+
+
+def test_read_raw_keeps_only_needed_columns(tmp_path):
+    raw = RawGenerator(seed=2, pool_size=50).batch(20)
+    raw['无关的列'] = 'x'
+    raw.to_csv(str(tmp_path / 'raw.csv'), encoding='gbk', index=False)
+    data = read_raw(str(tmp_path / 'raw.csv'), engine='c')
+    assert set(data.columns) <= set(RAW_COLUMNS)
+    assert '无关的列' not in data.columns
+    assert len(data) == 20
+
+
+def test_rows_keeps_only_the_chunks_categories():
+    s = pd.Series(pd.Categorical(['a', 'b', 'c', 'd']))
+    part = _rows(s, 1, 3)
+    assert list(part.cat.categories) == ['b', 'c']
+    frame = pd.DataFrame({'x': s, 'y': [1, 2, 3, 4]})
+    part = _rows(frame, 2, 4)
+    assert list(part['x'].cat.categories) == ['c', 'd']
+    assert part['y'].tolist() == [3, 4]
+
+
+def test_newlines_are_stripped_on_load(tmp_path):
+    raw = RawGenerator(seed=3, pool_size=50).batch(5)
+    raw.loc[raw.index[0], '突发事件情况'] = '父亲\n去世'
+    raw.to_csv(str(tmp_path / 'raw.csv'), encoding='gbk', index=False)
+    d = DataSet(str(tmp_path / 'raw.csv'), engine='c')
+    assert d.features['突发事件情况'].iloc[0] == '父亲去世'
+    for c in ['家庭其他成员在受教育情况', '突发事件情况', '家庭主要经济来源']:
+        assert not d.features[c].str.contains('\n', regex=False).any()
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from MLSR.matcher import KeywordMatcher
+from MLSR.keywords import INCOME_KEYWORDS, INCOME_EXACT
+
+PATTERNS = {'a': ['he', 'she', 'his'], 'b': ['hers', 'is'], 'c': ['父母', '母亲']}
+
+
+def _brute(text):
+    mask = 0
+    for i, words in enumerate(PATTERNS.values()):
+        if any(w in text for w in words):
+            mask |= 1 << i
+    return mask
+
+
+def test_scan_matches_substring_search():
+    m = KeywordMatcher(PATTERNS)
+    rng = np.random.default_rng(0)
+    alphabet = list('hersiy父母亲')
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet, rng.integers(0, 12)))
+        assert m.scan(text) == _brute(text), text
+
+
+def test_exact_tables_and_missing_values():
+    m = KeywordMatcher({'a': ['he']}, {'a': ['无'], 'd': ['无', '未写']})
+    assert m.names == ['a', 'd']
+    s = pd.Series(['无', '无收入', np.nan, 'the', '未写'], index=[5, 6, 7, 8, 9])
+    res = m.transform(s)
+    assert res.index.equals(s.index)
+    assert res['a'].tolist() == [True, False, False, True, False]
+    assert res['d'].tolist() == [True, False, False, False, True]
+
+
+def test_income_matcher_names_cover_exact_tables():
+    m = KeywordMatcher(INCOME_KEYWORDS, INCOME_EXACT)
+    assert set(m.names) == set(INCOME_KEYWORDS) | set(INCOME_EXACT)
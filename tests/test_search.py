@@ -0,0 +1,73 @@
+import warnings
+import numpy as np
+from sklearn.base import clone
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.svm import SVC
+from MLSR.evaluate import search_summary
+from MLSR.search import expand_grid, make_search
+
+X, Y = make_classification(120, 6, n_informative=4, n_classes=3, random_state=0)
+LOGISTIC_GRID = {
+    'lr__penalty': ['l1', 'l2', 'elasticnet', 'none', None],
+    'lr__solver': ['lbfgs', 'liblinear', 'saga'],
+    'lr__dual': [True, False],
+    'lr__l1_ratio': [0.5],
+    'lr__C': [0.1, 1],
+}
+
+
+def _logistic():
+    return Pipeline([('scaler', MinMaxScaler()), ('lr', LogisticRegression(max_iter=50))])
+
+
+def test_expanded_logistic_candidates_all_fit():
+    for y in (Y % 2, Y):
+        candidates, total = expand_grid(_logistic(), LOGISTIC_GRID, len(np.unique(y)))
+        assert total == 60 and 0 < len(candidates) < total
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for c in candidates:
+                clone(_logistic()).set_params(**{k: v[0] for k, v in c.items()}).fit(X, y)
+
+
+def test_expand_grid_drops_parameters_without_effect():
+    pipe = Pipeline([('svm', SVC())])
+    grid = {'svm__kernel': ['linear', 'poly'], 'svm__degree': [2, 3, 4]}
+    candidates, total = expand_grid(pipe, grid)
+    assert total == 6
+    # linear核与degree无关，三个候选合并为一个
+    assert len(candidates) == 4
+    assert {'svm__kernel': ['linear'], 'svm__degree': [3]} in candidates
+
+
+def test_search_summary_records_expansion():
+    grid = {'lr__C': [0.1, 1], 'lr__penalty': ['l2', 'elasticnet'], 'lr__solver': ['lbfgs']}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        search = make_search(_logistic(), grid, 'f1_macro', 'f1_macro', k=3, verbose=0, n_jobs=1, n_classes=3)
+        search.fit(X, Y)
+    assert search.expanded_from_ == 4
+    summary = search_summary(search)
+    assert summary['grid_expansion'] == {'expanded_from': 4, 'candidates': 2, 'fits_saved': 6}
+
+
+
+def test_expand_grid_without_penalty_keeps_default_regularisation():
+    candidates, total = expand_grid(_logistic(), {'lr__C': [1, 10], 'lr__solver': ['lbfgs', 'saga']}, 3)
+    assert total == 4 and len(candidates) == 4
+
+
+def test_search_summary_records_racing_rounds():
+    grid = {'lr__C': [1e-4, 1, 10], 'lr__solver': ['lbfgs']}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        search = make_search(_logistic(), grid, 'f1_macro', 'f1_macro', k=4, verbose=0, n_jobs=1, search='racing',
+                             search_params={'race_folds': 2, 'tolerance': 0.01})
+        search.fit(X, Y)
+    racing = search_summary(search)['racing']
+    assert racing == [{'folds': 2, 'candidates': 3, 'survivors': search.n_survivors_}]
+    assert 1 <= search.n_survivors_ <= 3
+    assert len(search.cv_results_['params']) == search.n_survivors_
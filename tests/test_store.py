@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from MLSR import store
+from MLSR.data import DataSet
+from MLSR.store import ColumnStore, FeatureCache, feature_version
+from MLSR.synth import RawGenerator
+
+
+def _part(start, n):
+    features = pd.DataFrame({
+        'f0': np.arange(start, start + n, dtype='uint8'),
+        'f1': np.arange(start, start + n) % 2 == 0,
+        'f2': np.linspace(0, 1, n, dtype='float32'),
+    })
+    return features, pd.Series(np.arange(n) % 2), pd.Series(np.full(n, -1))
+
+
+def test_column_store_append_and_read(tmp_path):
+    s = ColumnStore(str(tmp_path / 'store'))
+    a, b = _part(0, 4), _part(4, 3)
+    s.append(*a, features_name={'f0': 'x'})
+    s.append(*b)
+    features, label, strong_label, names = ColumnStore(str(tmp_path / 'store')).read(mmap=False)
+    expected = pd.concat([a[0], b[0]], ignore_index=True)
+    pd.testing.assert_frame_equal(features, expected)
+    assert label.tolist() == [0, 1, 0, 1, 0, 1, 0]
+    assert strong_label.tolist() == [-1] * 7
+    assert names == {'f0': 'x'}
+
+
+def test_save_load_keeps_memmap_columns(tmp_path):
+    d = DataSet()
+    d.features, d.label, d.strong_label = _part(0, 5)
+    d.features_name = {'f0': 'a', 'f1': 'b', 'f2': 'c'}
+    d.save(str(tmp_path / 'ds'))
+    loaded = DataSet.load(str(tmp_path / 'ds'))
+    assert all(isinstance(loaded.features[c].values, np.memmap) for c in loaded.features.columns)
+    for c in d.features.columns:
+        assert loaded.features[c].dtype == d.features[c].dtype
+        assert loaded.features[c].tolist() == d.features[c].tolist()
+    assert loaded.label.tolist() == d.label.tolist()
+    assert loaded.features_name == d.features_name
+
+
+def test_feature_cache_round_trip(tmp_path):
+    raw = tmp_path / 'raw.csv'
+    RawGenerator(seed=1, pool_size=200).to_csv(str(raw), 300)
+    cache_dir = str(tmp_path / 'cache')
+    first = DataSet.cached(str(raw), cache_dir=cache_dir)
+    assert FeatureCache(cache_dir).get(FeatureCache(cache_dir).key(str(raw), encode='gbk')) is not None
+    second = DataSet.cached(str(raw), cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(second.features, first.features)
+    assert second.label.tolist() == first.label.tolist()
+    assert second.features_name == first.features_name
+
+
+def test_feature_version_follows_dictionary(monkeypatch):
+    before = feature_version()
+    monkeypatch.setattr(store, 'dictionary_signature', lambda: 'another jieba')
+    assert feature_version() != before
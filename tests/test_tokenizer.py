@@ -0,0 +1,40 @@
+import numpy as np
+from MLSR.tokenizer import CachedTokenizer, segment
+
+VOCAB = {'父亲': 1, '母亲': 2, '去世': 3}
+TEXTS = ['父亲去世', '  母亲在家务农', '无', '父亲去世'] + ['母亲{}年前去世'.format(i) for i in range(40)]
+
+
+def test_cut_ids_csr_layout():
+    tk = CachedTokenizer(hmm=False)
+    ids, offsets = tk.cut_ids(TEXTS, VOCAB)
+    assert ids.dtype == np.int32 and offsets.dtype == np.int64
+    assert len(offsets) == len(TEXTS) + 1 and offsets[-1] == len(ids)
+    for k, text in enumerate(TEXTS):
+        # 非关键字只占位，记为0
+        assert ids[offsets[k]:offsets[k + 1]].tolist() == [VOCAB.get(w, 0) for w in tk.cut(text)]
+
+
+def test_parallel_segment_matches_serial(tmp_path):
+    serial = CachedTokenizer(hmm=False).cut_ids(TEXTS, VOCAB)
+    tk = CachedTokenizer(hmm=False, cache_path=str(tmp_path / 'cache'))
+    ids, offsets = segment(TEXTS, VOCAB, tk, n_jobs=2, chunksize=10)
+    assert ids.tolist() == serial[0].tolist()
+    assert offsets.tolist() == serial[1].tolist()
+    # 进程池中分好的结果写回了调用方的缓存
+    assert tk.stats()['size'] == len({t.strip() for t in TEXTS})
+    tk.close()
+    with CachedTokenizer(hmm=False, cache_path=str(tmp_path / 'cache')) as again:
+        segment(TEXTS, VOCAB, again, n_jobs=2, chunksize=10)
+        assert again.stats()['misses'] == 0
+
+
+def test_sync_persists_without_close(tmp_path):
+    path = str(tmp_path / 'cache')
+    tk = CachedTokenizer(hmm=False, cache_path=path)
+    tk.cut_ids(TEXTS, VOCAB)
+    tk.sync()
+    with CachedTokenizer(hmm=False, cache_path=path) as again:
+        again.cut_ids(TEXTS, VOCAB)
+        assert again.stats()['misses'] == 0
+    tk.close()